@@ -0,0 +1,94 @@
+"""
+Startup benchmark of a server worker, reports import time and RSS.
+
+Every run spawns a fresh interpreter the way fastapi run --workers does,
+imports the app and then the warmup modules the lifespan loads afterwards.
+Point --src at another checkout (e.g. a git worktree) to compare versions.
+
+Usage:
+    python bench/startup.py [--src PATH] [--runs N]
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.0
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# same as the default settings.WARMUP_MODULES, older trees have no settings
+WARMUP_MODULES = ["pandas", "aiohttp", "bs4", "lxml", "yfinance"]
+
+WORKER = """
+import importlib, json, resource, sys, time
+
+def rss_mb():
+    # ru_maxrss is in kilobytes on linux and bytes on macos
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+import_rss = rss_mb()
+
+for module in sys.argv[1:]:
+    importlib.import_module(module)
+warmed = time.perf_counter()
+
+print(json.dumps({
+    "import_s": imported - start,
+    "import_rss_mb": import_rss,
+    "warm_s": warmed - start,
+    "warm_rss_mb": rss_mb(),
+}))
+"""
+
+
+def run_worker(src: Path) -> dict[str, float]:
+    """
+    Spawns one worker process and gets its measurements.
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-c", WORKER, *WARMUP_MODULES],
+        cwd=src,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"worker failed:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Finance API startup benchmark")
+    parser.add_argument(
+        "--src",
+        type=Path,
+        default=Path(__file__).resolve().parent.parent / "src",
+        help="source directory of the app to measure",
+    )
+    parser.add_argument("--runs", type=int, default=5, help="number of workers")
+    args = parser.parse_args()
+
+    run_worker(args.src)  # populate bytecode and os caches
+    results = [run_worker(args.src) for _ in range(args.runs)]
+
+    print(f"{args.src} ({args.runs} runs, median)")
+    print(
+        f"  serving:   import {statistics.median(r['import_s'] for r in results):.2f}s"
+        f"  rss {statistics.median(r['import_rss_mb'] for r in results):.0f} MB"
+    )
+    print(
+        f"  warmed up: import {statistics.median(r['warm_s'] for r in results):.2f}s"
+        f"  rss {statistics.median(r['warm_rss_mb'] for r in results):.0f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
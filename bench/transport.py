@@ -0,0 +1,159 @@
+"""
+Transport overhead benchmark, TCP vs unix socket vs in-process calls.
+
+Serves history from the native backend against the stub yahoo server, so
+after the first call every request is a history cache hit and the numbers
+are dominated by transport and serialization.
+
+Usage:
+    python bench/transport.py [--requests N] [--ticker T]
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.0
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests")]
+
+from stub_yahoo import stub_server_thread  # noqa: E402
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    Keep-alive http connection over a unix domain socket.
+    """
+
+    def __init__(self, path: str):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def server_env(base_url: str) -> dict[str, str]:
+    return {
+        **os.environ,
+        "YAHOO_BACKEND": "native",
+        "YAHOO_BASE_URL": base_url,
+        # every request is charged, keep the quota out of the measurement
+        "ADMISSION_QUOTA_RATE": "1000000",
+        "ADMISSION_QUOTA_BURST": "1000000",
+    }
+
+
+@contextmanager
+def run_server(
+    base_url: str, workdir: str, uds: str | None = None
+) -> Iterator[http.client.HTTPConnection]:
+    """
+    Starts src/main.py and connects to it once it accepts requests.
+    """
+
+    args = [sys.executable, str(ROOT / "src" / "main.py")]
+    if uds is not None:
+        args += ["--uds", uds]
+    process = subprocess.Popen(
+        args,
+        cwd=workdir,
+        env=server_env(base_url),
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        address = process.stdout.readline().strip()  # PORT=... or SOCKET=...
+        key, value = address.split("=", 1)
+        for _ in range(200):
+            try:
+                connection = (
+                    UnixHTTPConnection(value)
+                    if key == "SOCKET"
+                    else http.client.HTTPConnection("localhost", int(value))
+                )
+                connection.request("GET", "/docs")
+                connection.getresponse().read()
+                break
+            except (ConnectionRefusedError, FileNotFoundError):
+                time.sleep(0.05)
+        else:
+            raise RuntimeError(f"server at {address} did not start")
+        yield connection
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def measure(call: Callable[[], object], requests: int) -> tuple[float, float]:
+    """
+    Gets p50 and p99 latency of call in milliseconds, after a warmup call.
+    """
+
+    call()  # fills the history cache
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Finance API transport benchmark")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--ticker", default="AAPL")
+    args = parser.parse_args()
+
+    path = f"/history/{args.ticker}?period=1mo"
+    results = {}
+    with stub_server_thread() as base_url, tempfile.TemporaryDirectory() as workdir:
+
+        def over(connection: http.client.HTTPConnection) -> Callable[[], bytes]:
+            def call() -> bytes:
+                connection.request("GET", path)
+                response = connection.getresponse()
+                body = response.read()
+                assert response.status == 200, body
+                return body
+
+            return call
+
+        with run_server(base_url, workdir) as connection:
+            results["tcp"] = measure(over(connection), args.requests)
+        uds = os.path.join(workdir, "finance-api.sock")
+        with run_server(base_url, workdir, uds=uds) as connection:
+            results["uds"] = measure(over(connection), args.requests)
+
+        # same settings as the server, read when the modules are imported
+        os.environ.update(server_env(base_url))
+        import embedded
+        from models.history import Period
+        from robot import session
+
+        results["in-process"] = measure(
+            lambda: embedded.history(args.ticker, period=Period.MONTH),
+            args.requests,
+        )
+        embedded._run(session.close_session())
+
+    print(f"{path}, {args.requests} sequential requests, history cache hits")
+    for transport, (p50, p99) in results.items():
+        print(f"  {transport:10}  p50 {p50:6.3f}ms  p99 {p99:6.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
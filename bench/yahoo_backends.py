@@ -0,0 +1,132 @@
+"""
+Concurrency benchmark of the yahoo backends against the local stub server.
+
+Runs the same burst of concurrent get_history calls through the yfinance
+backend (a thread per call) and the native asyncio backend, every call a
+cache miss, and reports throughput, latency and event loop lag.
+
+Usage:
+    python bench/yahoo_backends.py [--requests N] [--concurrency N] [--latency S]
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.0
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import warnings
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests")]
+
+import settings  # noqa: E402
+from models.history import Period  # noqa: E402
+from robot import session, yahoo, yahoo_native  # noqa: E402
+from stub_yahoo import stub_server_thread  # noqa: E402
+
+
+def point_backends_at(base_url: str):
+    """
+    Redirects both backends to the stub server.
+    """
+
+    import yfinance.base
+    import yfinance.data
+    import yfinance.scrapers.history
+
+    warnings.filterwarnings("ignore", category=DeprecationWarning, module="yfinance")
+
+    yfinance.base._BASE_URL_ = base_url
+    yfinance.scrapers.history._BASE_URL_ = base_url
+    # cookie and crumb urls are hardcoded, chart requests do not check them
+    yfinance.data.YfData._get_cookie_and_crumb = lambda self, proxy=None, timeout=30: (
+        None,
+        "bench",
+        "basic",
+    )
+    yahoo_native.CHART_URL = f"{base_url}/v8/finance/chart/{{ticker}}"
+
+
+async def monitor_lag(lags: list[float], interval: float = 0.005):
+    """
+    Records how late the event loop wakes up, until cancelled.
+    """
+
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run_backend(
+    backend: str, run: int, requests: int, concurrency: int
+) -> dict[str, float]:
+    settings.YAHOO_BACKEND = backend
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, lags = [], []
+
+    async def call(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            # distinct short tickers miss the history cache, long ones
+            # would be looked up by yfinance as isin
+            ticker = f"{backend[0].upper()}{run + 1}X{i}"
+            await yahoo.get_history(ticker, period=Period.MONTH)
+            latencies.append(time.perf_counter() - start)
+
+    monitor = asyncio.create_task(monitor_lag(lags))
+    start = time.perf_counter()
+    await asyncio.gather(*[call(i) for i in range(requests)])
+    elapsed = time.perf_counter() - start
+    monitor.cancel()
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "max_lag_ms": max(lags, default=0) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Yahoo backend benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="stub server delay in seconds"
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with stub_server_thread(args.latency) as base_url:
+        point_backends_at(base_url)
+        print(
+            f"{args.requests} requests, concurrency {args.concurrency}, "
+            f"stub latency {args.latency * 1000:.0f}ms, median of {args.runs} runs"
+        )
+        for backend in ("yfinance", "native"):
+            await run_backend(backend, -1, args.concurrency, args.concurrency)  # warm
+            results = [
+                await run_backend(backend, run, args.requests, args.concurrency)
+                for run in range(args.runs)
+            ]
+            median = {
+                key: statistics.median(result[key] for result in results)
+                for key in results[0]
+            }
+            print(
+                f"  {backend:9} {median['throughput']:7.1f} req/s"
+                f"  p50 {median['p50_ms']:6.1f}ms  p99 {median['p99_ms']:6.1f}ms"
+                f"  max loop lag {median['max_lag_ms']:5.1f}ms"
+            )
+        await session.close_session()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
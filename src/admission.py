@@ -0,0 +1,380 @@
+"""
+Admission control with weighted fair queuing and cost based client quotas.
+
+Every request is charged a cost from its endpoint and parameters against the
+token bucket of its client (configured api key, else ip). Admitted requests
+and export job units share a fixed number of slots, waiting work is served
+in order of its virtual finish time so interactive endpoints and light
+clients are not stuck behind a batch client. State is per worker.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.2.1
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import date
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import settings
+from models.admission import AdmissionMetrics, QueueWaitStats, RequestClass
+from models.financials import STOCK_METAINFO_SOURCES
+from models.history import Period
+from models.jobs import ExportDataset, ExportJobRequest
+
+CLASS_WEIGHTS = {
+    RequestClass.INTERACTIVE: 4.0,
+    RequestClass.BATCH: 1.0,
+}
+
+# first path segment -> (class, base cost), other paths bypass admission
+ENDPOINTS = {
+    "intraday": (RequestClass.INTERACTIVE, 1),
+    "metainfo": (RequestClass.INTERACTIVE, 3),
+    "tags": (RequestClass.INTERACTIVE, 1),
+    "news": (RequestClass.INTERACTIVE, 1),
+    "history": (RequestClass.BATCH, 1),
+    "income": (RequestClass.BATCH, 2),
+    "cashflow": (RequestClass.BATCH, 2),
+    "balance": (RequestClass.BATCH, 2),
+    "sec": (RequestClass.BATCH, 2),
+    "analytics": (RequestClass.BATCH, 1),
+    "jobs": (RequestClass.BATCH, 1),
+}
+
+HISTORY_PERIOD_COSTS = {
+    "1d": 1,
+    "5d": 1,
+    "1mo": 1,
+    "3mo": 2,
+    "6mo": 2,
+    "ytd": 2,
+    "1y": 3,
+    "2y": 4,
+    "5y": 6,
+    "10y": 8,
+    "max": 10,
+}
+
+
+class QuotaExceededError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"quota exceeded, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def request_cost(endpoint: str, query: QueryParams) -> int:
+    """
+    Gets quota cost of a request, longer histories and more tickers cost more.
+    """
+
+    base_cost = ENDPOINTS[endpoint][1]
+
+    if endpoint == "history":
+        start, end = query.get("start"), query.get("end")
+        if start is not None and end is not None:
+            try:
+                years = (date.fromisoformat(end) - date.fromisoformat(start)).days / 365
+                return max(1, min(10, math.ceil(years)))
+            except ValueError:
+                return base_cost  # rejected by the endpoint anyway
+        return HISTORY_PERIOD_COSTS.get(query.get("period", "max"), 10)
+
+    if endpoint in ("analytics", "news") and "tickers" in query:
+        return base_cost * max(1, len(query["tickers"].split(",")))
+
+    if endpoint == "metainfo" and "fields" in query:
+        # one per upstream source the requested fields come from
+        sources = {
+            STOCK_METAINFO_SOURCES[field.strip()]
+            for field in query["fields"].split(",")
+            if field.strip() in STOCK_METAINFO_SOURCES
+        }
+        return max(1, len(sources))
+
+    return base_cost
+
+
+def export_unit_cost(dataset: ExportDataset, period: Period) -> int:
+    """
+    Gets cost of exporting one dataset of one ticker, same as its endpoint.
+    """
+
+    if dataset is ExportDataset.HISTORY:
+        return HISTORY_PERIOD_COSTS[period.value]
+    return ENDPOINTS[dataset.value][1]
+
+
+def export_job_cost(request: ExportJobRequest) -> int:
+    """
+    Gets quota cost of an export job, the cost of all its units.
+    """
+
+    return len(request.tickers) * sum(
+        export_unit_cost(dataset, request.period) for dataset in request.datasets
+    )
+
+
+def client_id(scope: Scope) -> str:
+    """
+    Gets client a request is accounted to, unknown api keys count as their ip.
+    """
+
+    api_key = Headers(scope=scope).get("x-api-key")
+    if api_key is not None and api_key in settings.ADMISSION_API_KEYS:
+        return f"key:{api_key}"
+    return f"ip:{scope['client'][0]}" if scope.get("client") else "ip:unknown"
+
+
+class TokenBucket:
+    """
+    Quota of a client, refills at rate up to burst.
+    """
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, burst: float):
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def refill(self, rate: float, burst: float, now: float) -> float:
+        """
+        Gets tokens of the bucket at now.
+        """
+
+        return min(burst, self.tokens + (now - self.updated_at) * rate)
+
+    def take(self, cost: float, rate: float, burst: float):
+        """
+        Takes cost from the bucket.
+
+        Raises:
+            QuotaExceededError if not enough tokens are left.
+        """
+
+        now = time.monotonic()
+        self.tokens = self.refill(rate, burst, now)
+        self.updated_at = now
+        if self.tokens < cost:
+            raise QuotaExceededError((cost - self.tokens) / rate)
+        self.tokens -= cost
+
+
+class AdmissionController:
+    """
+    Grants concurrency slots to requests in weighted fair order.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        quota_rate: float,
+        quota_burst: float,
+        idle_ttl: float = 600,
+        metrics_window: int = 1000,
+    ):
+        self.concurrency = concurrency
+        self.quota_rate = quota_rate
+        self.quota_burst = quota_burst
+        self.idle_ttl = idle_ttl
+        self.available = concurrency
+        self.rejected = 0
+
+        self._virtual_time = 0.0
+        self._finish_tags: dict[str, float] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._swept_at = time.monotonic()
+        self._queue: list[tuple[float, int, float, asyncio.Future]] = []
+        self._queued = {request_class: 0 for request_class in RequestClass}
+        self._sequence = itertools.count()
+        self._waits = {
+            request_class: deque(maxlen=metrics_window)
+            for request_class in RequestClass
+        }
+
+    def _sweep(self, now: float):
+        """
+        Evicts state of idle clients, a full bucket equals a new one.
+        """
+
+        self._swept_at = now
+        self._buckets = {
+            client: bucket
+            for client, bucket in self._buckets.items()
+            if now - bucket.updated_at < self.idle_ttl
+            or bucket.refill(self.quota_rate, self.quota_burst, now) < self.quota_burst
+        }
+        # tags behind virtual time are the same as no tag
+        self._finish_tags = {
+            client: tag
+            for client, tag in self._finish_tags.items()
+            if tag > self._virtual_time
+        }
+
+    def charge(self, client: str, cost: float):
+        """
+        Charges cost to quota of client, costs above burst take the full burst.
+
+        Raises:
+            QuotaExceededError if client has no quota left for cost.
+        """
+
+        now = time.monotonic()
+        if now - self._swept_at >= self.idle_ttl:
+            self._sweep(now)
+
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.quota_burst)
+        try:
+            bucket.take(min(cost, self.quota_burst), self.quota_rate, self.quota_burst)
+        except QuotaExceededError:
+            self.rejected += 1
+            raise
+
+    async def acquire(self, client: str, request_class: RequestClass, cost: float):
+        """
+        Waits for a slot, release it once the work is done.
+        """
+
+        start_tag = max(self._virtual_time, self._finish_tags.get(client, 0.0))
+        finish_tag = start_tag + cost / CLASS_WEIGHTS[request_class]
+        self._finish_tags[client] = finish_tag
+
+        if self.available > 0 and not self._queue:
+            self.available -= 1
+            self._waits[request_class].append(0.0)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        enqueued_at = time.monotonic()
+        heapq.heappush(
+            self._queue, (finish_tag, next(self._sequence), start_tag, future)
+        )
+        self._queued[request_class] += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # slot was granted as the request went away
+            raise
+        finally:
+            self._queued[request_class] -= 1
+
+        self._waits[request_class].append(time.monotonic() - enqueued_at)
+
+    def release(self):
+        """
+        Hands the slot of finished work to the next waiting request.
+        """
+
+        while self._queue:
+            _finish_tag, _sequence, start_tag, future = heapq.heappop(self._queue)
+            if future.cancelled():
+                continue
+            self._virtual_time = start_tag
+            future.set_result(None)
+            return
+
+        self.available += 1
+        # idle, clients with tags behind virtual time start fresh anyway
+        self._finish_tags.clear()
+
+    @asynccontextmanager
+    async def slot(
+        self, client: str, request_class: RequestClass, cost: float
+    ) -> AsyncIterator[None]:
+        """
+        Holds a slot while the body runs, quota is not charged.
+        """
+
+        await self.acquire(client, request_class, cost)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def metrics(self) -> AdmissionMetrics:
+        classes = {}
+        for request_class, waits in self._waits.items():
+            sorted_waits = sorted(waits)
+            count = len(sorted_waits)
+
+            def percentile(q: float) -> float:
+                return sorted_waits[min(count - 1, int(q * count))] if count else 0.0
+
+            classes[request_class] = QueueWaitStats(
+                count=count,
+                p50=percentile(0.5),
+                p99=percentile(0.99),
+                max=sorted_waits[-1] if count else 0.0,
+                queued=self._queued[request_class],
+            )
+
+        return AdmissionMetrics(
+            in_flight=self.concurrency - self.available,
+            rejected=self.rejected,
+            classes=classes,
+        )
+
+
+admission_controller = AdmissionController(
+    settings.ADMISSION_CONCURRENCY,
+    settings.ADMISSION_QUOTA_RATE,
+    settings.ADMISSION_QUOTA_BURST,
+    settings.ADMISSION_IDLE_TTL,
+)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware putting requests of known endpoints through admission.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController | None = None):
+        self.app = app
+        self.controller = controller or admission_controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path) :]
+        endpoint = path.strip("/").split("/")[0]
+        if endpoint not in ENDPOINTS:
+            return await self.app(scope, receive, send)
+
+        client = client_id(scope)
+        request_class = ENDPOINTS[endpoint][0]
+        cost = request_cost(endpoint, QueryParams(scope["query_string"]))
+
+        try:
+            # export jobs are charged by their handler once the universe is known,
+            # charging here as well would keep the bucket short of a full burst
+            if not (endpoint == "jobs" and scope["method"] == "POST"):
+                self.controller.charge(client, cost)
+        except QuotaExceededError as e:
+            response = JSONResponse(
+                {"detail": f"Too many requests: {e}"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+            return await response(scope, receive, send)
+
+        async with self.controller.slot(client, request_class, cost):
+            await self.app(scope, receive, send)
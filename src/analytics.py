@@ -0,0 +1,117 @@
+"""
+Vectorized multi-ticker analytics over aligned close prices.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.1
+"""
+
+from __future__ import annotations
+
+from functools import reduce
+
+from utils import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def align_closes(histories: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Aligns close prices of histories on the dates all tickers traded.
+
+    Args:
+        histories (dict[str, pd.DataFrame]): yahoo.get_history frames by ticker
+
+    Returns:
+        pd.DataFrame: close prices with one column per ticker, indexed by date
+    """
+
+    # exchanges differ in timezone, compare by local trading date
+    dates = {
+        ticker: pd.DatetimeIndex(df.index).tz_localize(None).normalize().asi8
+        for ticker, df in histories.items()
+    }
+    common_dates = reduce(np.intersect1d, dates.values())
+
+    # gather closes of common dates straight into one (dates, tickers) matrix
+    closes = np.empty((len(common_dates), len(histories)))
+    for i, (ticker, df) in enumerate(histories.items()):
+        positions = np.searchsorted(dates[ticker], common_dates)
+        closes[:, i] = df["Close"].to_numpy()[positions]
+
+    return pd.DataFrame(
+        closes,
+        index=pd.DatetimeIndex(common_dates.view("M8[ns]"), name="Date"),
+        columns=list(histories),
+    ).dropna()
+
+
+def compute_analytics(
+    closes: pd.DataFrame, benchmark: str, window: int
+) -> dict[str, pd.DataFrame]:
+    """
+    Computes returns, volatility, beta, correlation and covariance in one pass.
+
+    Args:
+        closes (pd.DataFrame): aligned close prices from align_closes
+        benchmark (str): column of closes used to compute beta
+        window (int): rolling volatility window in trading days
+
+    Returns:
+        dict[str, pd.DataFrame]: tables keyed by AnalyticsMetric values
+    """
+
+    tickers = closes.columns
+    prices = closes.to_numpy()
+    returns = prices[1:] / prices[:-1] - 1
+
+    annualize = np.sqrt(TRADING_DAYS_PER_YEAR)
+    volatility = returns.std(axis=0, ddof=1) * annualize
+    covariance = np.atleast_2d(np.cov(returns, rowvar=False)) * TRADING_DAYS_PER_YEAR
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = np.atleast_2d(np.corrcoef(returns, rowvar=False))
+        benchmark_index = tickers.get_loc(benchmark)
+        beta = (
+            covariance[:, benchmark_index]
+            / covariance[benchmark_index, benchmark_index]
+        )
+
+    rolling_dates = closes.index[window:]
+    if len(returns) >= window:
+        # window sums from cumulative sums of r and r^2, O(dates x tickers);
+        # demeaned first so the sums stay small and do not cancel
+        centered = returns - returns.mean(axis=0)
+        zeros = np.zeros((1, len(tickers)))
+        sums = np.concatenate([zeros, np.cumsum(centered, axis=0)])
+        squares = np.concatenate([zeros, np.cumsum(centered**2, axis=0)])
+        window_sums = sums[window:] - sums[:-window]
+        window_squares = squares[window:] - squares[:-window]
+        variance = (window_squares - window_sums**2 / window) / (window - 1)
+        rolling_volatility = np.sqrt(np.maximum(variance, 0)) * annualize
+    else:
+        rolling_volatility = np.empty((0, len(tickers)))
+
+    summary = pd.DataFrame(
+        {
+            "Total Return": prices[-1] / prices[0] - 1,
+            "Volatility": volatility,
+            "Rolling Volatility": (
+                rolling_volatility[-1] if len(rolling_volatility) else np.nan
+            ),
+            "Beta": beta,
+        },
+        index=tickers,
+    )
+
+    return {
+        "summary": summary,
+        "returns": pd.DataFrame(returns, index=closes.index[1:], columns=tickers),
+        "rolling_volatility": pd.DataFrame(
+            rolling_volatility, index=rolling_dates, columns=tickers
+        ),
+        "correlation": pd.DataFrame(correlation, index=tickers, columns=tickers),
+        "covariance": pd.DataFrame(covariance, index=tickers, columns=tickers),
+    }
@@ -3,11 +3,62 @@ Fastapi entry file.
 
 Author: tigerding
 Email: zhiyuanding01@gmail.com
-Version: 0.1.0
+Version: 0.8.0
 """
 
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+
+import settings
+import tasks
+from admission import AdmissionMiddleware
+from robot import finviz, session
 from router import router
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    background_tasks = []
+    if settings.WARMUP_MODULES:
+        # heavy dependencies are lazy, load them without delaying startup
+        background_tasks.append(
+            asyncio.create_task(
+                asyncio.to_thread(
+                    lambda: [
+                        importlib.import_module(m) for m in settings.WARMUP_MODULES
+                    ]
+                )
+            )
+        )
+    await tasks.get_export_manager().resume_all()
+    if settings.INTRADAY_TICKERS:
+        background_tasks.append(
+            asyncio.create_task(
+                tasks.collect_intraday(
+                    settings.INTRADAY_TICKERS, settings.INTRADAY_COLLECT_INTERVAL
+                )
+            )
+        )
+    if settings.NEWS_POLL_TICKERS:
+        background_tasks.append(
+            asyncio.create_task(
+                tasks.poll_news(settings.NEWS_POLL_TICKERS, settings.NEWS_POLL_INTERVAL)
+            )
+        )
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await tasks.get_export_manager().shutdown()
+    finviz.shutdown_parser_pool()
+    await session.close_session()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(AdmissionMiddleware)
 app.include_router(router)
@@ -0,0 +1,181 @@
+"""
+In-memory cache of historical bars kept in a compact columnar layout.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.0
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+
+from utils import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+VOLUME_COLUMN = "Volume"
+
+
+class CompactBars:
+    """
+    Bars stored as int64 epoch nanoseconds, float32 prices and int64 volumes.
+
+    Price columns share one contiguous (columns, bars) float32 array, 1M bars
+    of yfinance history take 38 MB instead of 61 MB as float64 DataFrame.
+    All arrays are read only so frames built on top of them can not corrupt
+    the cache.
+    """
+
+    __slots__ = (
+        "timestamps",
+        "prices",
+        "volumes",
+        "price_columns",
+        "volume_position",
+        "tz",
+        "index_name",
+    )
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        prices: np.ndarray,
+        volumes: np.ndarray | None,
+        price_columns: list[str],
+        volume_position: int | None,
+        tz: str | None,
+        index_name: str | None,
+    ):
+        for array in (timestamps, prices, volumes):
+            if array is not None:
+                array.flags.writeable = False
+
+        self.timestamps = timestamps
+        self.prices = prices
+        self.volumes = volumes
+        self.price_columns = price_columns
+        self.volume_position = volume_position
+        self.tz = tz
+        self.index_name = index_name
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> CompactBars:
+        """
+        Packs DataFrame of yahoo.get_history into compact bars.
+        """
+
+        columns = df.columns.tolist()
+        price_columns = [column for column in columns if column != VOLUME_COLUMN]
+        has_volume = VOLUME_COLUMN in columns
+
+        index = pd.DatetimeIndex(df.index)
+        timestamps = (
+            index.tz_convert("UTC").tz_localize(None) if index.tz is not None else index
+        ).asi8.copy()
+
+        return cls(
+            timestamps=timestamps,
+            prices=np.ascontiguousarray(df[price_columns].to_numpy(np.float32).T),
+            volumes=(
+                df[VOLUME_COLUMN].fillna(0).to_numpy(np.int64) if has_volume else None
+            ),
+            price_columns=price_columns,
+            volume_position=columns.index(VOLUME_COLUMN) if has_volume else None,
+            tz=str(index.tz) if index.tz is not None else None,
+            index_name=df.index.name,
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Builds DataFrame view over the compact arrays without copying prices.
+        """
+
+        index = pd.DatetimeIndex(self.timestamps.view("M8[ns]"), name=self.index_name)
+        if self.tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self.tz)
+
+        # transposed (bars, columns) view keeps the block layout pandas uses
+        df = pd.DataFrame(
+            self.prices.T, index=index, columns=self.price_columns, copy=False
+        )
+        if self.volumes is not None:
+            df.insert(self.volume_position, VOLUME_COLUMN, self.volumes)
+        return df
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Gets memory held by the arrays.
+        """
+
+        return sum(
+            array.nbytes
+            for array in (self.timestamps, self.prices, self.volumes)
+            if array is not None
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+def widen_prices(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts float32 columns to float64 keeping their shortest decimal form.
+
+    Plain casting would serialize 1.1 as 1.100000023841858 in json responses.
+    """
+
+    for column in df.columns[df.dtypes == np.float32]:
+        df[column] = df[column].to_numpy().astype(str).astype(np.float64)
+    return df
+
+
+class HistoryCache:
+    """
+    LRU cache of compact bars bounded by total bytes, entries expire at a deadline.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: OrderedDict[Hashable, tuple[float, CompactBars]] = OrderedDict()
+
+    def get(self, key: Hashable) -> CompactBars | None:
+        """
+        Gets unexpired bars for key, None if missing.
+        """
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, bars = entry
+        if time.time() >= expires_at:
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return bars
+
+    def put(self, key: Hashable, bars: CompactBars, ttl: float):
+        """
+        Stores bars for key for ttl seconds, evicting least recently used entries.
+        """
+
+        if key in self._entries:
+            self._remove(key)
+        if bars.nbytes > self.max_bytes or ttl <= 0:
+            return
+
+        self._entries[key] = (time.time() + ttl, bars)
+        self.nbytes += bars.nbytes
+        while self.nbytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Hashable):
+        _expires_at, bars = self._entries.pop(key)
+        self.nbytes -= bars.nbytes
@@ -0,0 +1,146 @@
+"""
+In-process API returning robot DataFrames directly, without http or csv.
+
+The robots are async, calls run on a private event loop thread so the
+functions can be used from both sync code and code running its own loop.
+Finviz pages are parsed in threads unless PARSER_POOL is set, a spawned
+process pool would re-import scripts without a __main__ guard.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.2
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from collections.abc import Coroutine
+from datetime import datetime
+from typing import Any
+
+import settings
+from models.financials import STOCK_METAINFO_SOURCES, StatementType
+from models.history import Period
+from robot import finviz, yahoo
+from robot.metainfo import get_metainfo
+from utils import lazy_import
+
+pd = lazy_import("pandas")
+
+if "PARSER_POOL" not in os.environ:
+    settings.PARSER_POOL = "thread"
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def _run(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Runs coroutine on the embedded event loop and waits for its result.
+    """
+
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="finance-api-embedded", daemon=True
+            ).start()
+
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+
+def history(
+    ticker: str,
+    interval: str = "1d",
+    period: Period | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> pd.DataFrame:
+    """
+    Gets historical data for ticker, same as /history.
+    """
+
+    if period is None and (start is None or end is None):
+        period = Period.MAX
+    # cached bars are read-only views, callers get a frame of their own
+    return _run(yahoo.get_history(ticker, interval, period, start, end)).copy()
+
+
+def intraday(ticker: str) -> pd.DataFrame:
+    """
+    Gets today's 1-minute bars for ticker, same as /intraday.
+    """
+
+    return _run(yahoo.get_history(ticker, interval="1m", period=Period.DAY)).copy()
+
+
+def income_statement(
+    ticker: str, type: StatementType = StatementType.YEARLY
+) -> pd.DataFrame:
+    """
+    Gets income statement for ticker.
+    """
+
+    return _run(yahoo.get_income_statement(ticker, type))
+
+
+def cashflow_statement(
+    ticker: str, type: StatementType = StatementType.YEARLY
+) -> pd.DataFrame:
+    """
+    Gets cash flow statement for ticker.
+    """
+
+    return _run(yahoo.get_cashflow_statement(ticker, type))
+
+
+def balance_sheet(
+    ticker: str, type: StatementType = StatementType.YEARLY
+) -> pd.DataFrame:
+    """
+    Gets balance sheet for ticker.
+    """
+
+    return _run(yahoo.get_balance_sheet(ticker, type))
+
+
+def sec_filings(ticker: str) -> pd.DataFrame:
+    """
+    Gets SEC filings for ticker.
+    """
+
+    return _run(yahoo.get_sec_filings(ticker))
+
+
+def metainfo(ticker: str, fields: list[str] | None = None) -> pd.DataFrame:
+    """
+    Gets meta info for ticker, same as /metainfo.
+
+    Raises:
+        ValueError if fields has unknown StockMetaInfo fields.
+    """
+
+    if fields is not None:
+        unknown = [field for field in fields if field not in STOCK_METAINFO_SOURCES]
+        if unknown or not fields:
+            raise ValueError(f"unknown metainfo fields {unknown}")
+    return _run(get_metainfo(ticker, fields))
+
+
+def tags(ticker: str) -> pd.DataFrame:
+    """
+    Gets finviz tags for ticker.
+    """
+
+    return _run(finviz.get_tags(ticker))
+
+
+def news(ticker: str) -> pd.DataFrame:
+    """
+    Gets latest finviz news for ticker.
+    """
+
+    return _run(finviz.get_news(ticker))
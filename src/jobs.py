@@ -0,0 +1,319 @@
+"""
+Bulk export jobs writing partitioned Parquet datasets.
+
+Job request and progress live next to the data, so any worker can report
+progress and an interrupted job resumes from the units it had not completed.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.3
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any
+
+from admission import admission_controller, export_unit_cost
+from models.admission import RequestClass
+from models.jobs import ExportDataset, ExportJobRequest, ExportJobState, ExportJobStatus
+from robot import yahoo
+from robot.metainfo import get_metainfo
+from utils import convert_keys, lazy_import
+
+pd = lazy_import("pandas")
+
+MANIFEST_FILE = "job.json"
+PROGRESS_FILE = "progress.jsonl"
+LOCK_FILE = ".lock"
+
+STATEMENT_FUNCS = {
+    ExportDataset.INCOME: yahoo.get_income_statement,
+    ExportDataset.CASHFLOW: yahoo.get_cashflow_statement,
+    ExportDataset.BALANCE: yahoo.get_balance_sheet,
+}
+
+
+async def fetch_history(ticker: str, request: ExportJobRequest) -> pd.DataFrame:
+    df = await yahoo.get_history(ticker, period=request.period)
+    df = df.reset_index()
+    df.rename(columns={df.columns[0]: "Date"}, inplace=True)
+    df["year"] = df["Date"].dt.year
+    return df
+
+
+async def fetch_statement(
+    ticker: str, request: ExportJobRequest, dataset: ExportDataset
+) -> pd.DataFrame:
+    df = await STATEMENT_FUNCS[dataset](ticker, request.statement_type)
+    # line items x dates into long rows
+    df = (
+        df.stack(future_stack=True)
+        .rename("Value")
+        .rename_axis(["Item", "Date"])
+        .reset_index()
+    )
+    df["Value"] = pd.to_numeric(df["Value"], errors="coerce")
+    return df
+
+
+async def fetch_metainfo(ticker: str, _request: ExportJobRequest) -> pd.DataFrame:
+    df = await get_metainfo(ticker)
+    # mixed value types, kept as text so every ticker shares one schema
+    values = [None if pd.isna(v) else str(v) for v in df["Value"]]
+    return pd.DataFrame(
+        {
+            "Field": convert_keys(df.index.tolist()),
+            "Value": pd.Series(values, dtype="string"),
+        }
+    )
+
+
+class ExportJob:
+    """
+    Export job of one universe, units run with bounded parallelism.
+    """
+
+    def __init__(self, path: Path, manifest: dict[str, Any]):
+        self.path = path
+        self.manifest = manifest
+        self.request = ExportJobRequest.model_validate(manifest["request"])
+
+    @property
+    def units(self) -> list[tuple[ExportDataset, str]]:
+        return [
+            (dataset, ticker)
+            for dataset in self.request.datasets
+            for ticker in self.request.tickers
+        ]
+
+    def _write(self, dataset: ExportDataset, ticker: str, df: pd.DataFrame):
+        df["ticker"] = ticker
+        partition_cols = ["ticker", "year"] if "year" in df.columns else ["ticker"]
+        # rewriting the ticker partitions makes retried units idempotent
+        df.to_parquet(
+            self.path / dataset.value,
+            engine="pyarrow",
+            index=False,
+            partition_cols=partition_cols,
+            existing_data_behavior="delete_matching",
+        )
+
+    async def _run_unit(self, dataset: ExportDataset, ticker: str):
+        if dataset is ExportDataset.HISTORY:
+            df = await fetch_history(ticker, self.request)
+        elif dataset is ExportDataset.METAINFO:
+            df = await fetch_metainfo(ticker, self.request)
+        else:
+            df = await fetch_statement(ticker, self.request, dataset)
+        await asyncio.to_thread(self._write, dataset, ticker, df)
+
+    async def run(self, concurrency: int):
+        """
+        Runs units not completed yet, progress is logged after each unit.
+        """
+
+        semaphore = asyncio.Semaphore(concurrency)
+        completed, _failed = await asyncio.to_thread(read_progress, self.path)
+
+        async def run_unit(dataset: ExportDataset, ticker: str):
+            # units share admission slots with requests, weighted as batch
+            slot = admission_controller.slot(
+                f"job:{self.manifest['id']}",
+                RequestClass.BATCH,
+                export_unit_cost(dataset, self.request.period),
+            )
+            async with semaphore, slot:
+                try:
+                    await self._run_unit(dataset, ticker)
+                    error = None
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+            await asyncio.to_thread(
+                log_progress, self.path, unit_key(dataset, ticker), error
+            )
+
+        await asyncio.gather(
+            *[
+                run_unit(dataset, ticker)
+                for dataset, ticker in self.units
+                if unit_key(dataset, ticker) not in completed
+            ]
+        )
+
+        self.manifest["state"] = ExportJobState.COMPLETED.value
+        await asyncio.to_thread(write_manifest, self.path, self.manifest)
+
+
+def unit_key(dataset: ExportDataset, ticker: str) -> str:
+    return f"{dataset.value}/{ticker}"
+
+
+def write_manifest(path: Path, manifest: dict[str, Any]):
+    """
+    Atomically replaces job manifest.
+    """
+
+    tmp_path = path / f"{MANIFEST_FILE}.tmp"
+    tmp_path.write_text(json.dumps(manifest))
+    os.replace(tmp_path, path / MANIFEST_FILE)
+
+
+def read_manifest(path: Path) -> dict[str, Any] | None:
+    try:
+        return json.loads((path / MANIFEST_FILE).read_text())
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def log_progress(path: Path, key: str, error: str | None):
+    """
+    Appends result of a unit to the progress log.
+    """
+
+    with open(path / PROGRESS_FILE, "a") as f:
+        f.write(json.dumps({"unit": key, "error": error}) + "\n")
+
+
+def read_progress(path: Path) -> tuple[set[str], dict[str, str]]:
+    """
+    Replays progress log into completed units and failed units with errors.
+    """
+
+    completed, failed = set(), {}
+    try:
+        with open(path / PROGRESS_FILE) as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return completed, failed
+
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue  # torn write of an interrupted job
+        if entry["error"] is None:
+            completed.add(entry["unit"])
+            failed.pop(entry["unit"], None)
+        elif entry["unit"] not in completed:
+            failed[entry["unit"]] = entry["error"]
+    return completed, failed
+
+
+def read_status(path: Path) -> ExportJobStatus | None:
+    """
+    Gets progress of job at path, None if there is no job.
+    """
+
+    manifest = read_manifest(path)
+    if manifest is None:
+        return None
+
+    completed, failed = read_progress(path)
+    request = manifest["request"]
+    return ExportJobStatus(
+        id=manifest["id"],
+        state=ExportJobState(manifest["state"]),
+        total=len(request["tickers"]) * len(request["datasets"]),
+        completed=len(completed),
+        failed=failed,
+        path=str(path.resolve()),
+    )
+
+
+class ExportJobManager:
+    """
+    Submits, runs and resumes export jobs under root/<job id>.
+    """
+
+    def __init__(self, root: str, concurrency: int):
+        self.root = Path(root)
+        self.concurrency = concurrency
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def _start(self, job: ExportJob) -> bool:
+        """
+        Runs job in this worker unless another worker holds its lock.
+        """
+
+        lock_file = open(job.path / LOCK_FILE, "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+
+        async def run():
+            try:
+                await job.run(self.concurrency)
+            finally:
+                self._tasks.pop(job.manifest["id"], None)
+                lock_file.close()  # releases the lock
+
+        self._tasks[job.manifest["id"]] = asyncio.create_task(run())
+        return True
+
+    async def submit(self, request: ExportJobRequest) -> ExportJobStatus:
+        """
+        Creates job for request and starts running it.
+        """
+
+        job_id = uuid.uuid4().hex
+        path = self.root / job_id
+        path.mkdir(parents=True)
+        manifest = {
+            "id": job_id,
+            "state": ExportJobState.RUNNING.value,
+            "request": request.model_dump(mode="json"),
+        }
+        await asyncio.to_thread(write_manifest, path, manifest)
+
+        self._start(ExportJob(path, manifest))
+        return await asyncio.to_thread(read_status, path)
+
+    async def status(self, job_id: str) -> ExportJobStatus | None:
+        """
+        Gets progress of job, None if no such job.
+        """
+
+        path = self.root / job_id
+        if path.name != job_id or not job_id.isalnum():
+            return None  # not a job id, never look outside root
+        return await asyncio.to_thread(read_status, path)
+
+    async def resume_all(self):
+        """
+        Resumes running jobs no worker is running, e.g. after a restart.
+        """
+
+        if not self.root.exists():
+            return
+
+        for path in self.root.iterdir():
+            if not path.is_dir():
+                continue  # e.g. .DS_Store, only job directories hold manifests
+            manifest = await asyncio.to_thread(read_manifest, path)
+            if manifest and manifest["state"] == ExportJobState.RUNNING.value:
+                try:
+                    job = ExportJob(path, manifest)
+                except ValueError:
+                    # request no longer valid, e.g. tickers accepted before
+                    # validation, finish it instead of failing every startup
+                    manifest["state"] = ExportJobState.COMPLETED.value
+                    await asyncio.to_thread(write_manifest, path, manifest)
+                    continue
+                self._start(job)
+
+    async def shutdown(self):
+        """
+        Cancels running jobs, they resume on the next startup.
+        """
+
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
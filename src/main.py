@@ -3,9 +3,11 @@ FastAPI local server entry point.
 
 Author: tigerding
 Email: zhiyuanding01@gmail.com
-Version: 0.1.0
+Version: 0.2.0
 """
 
+import argparse
+import importlib.util
 import socket
 from app import app
 import uvicorn
@@ -20,17 +22,35 @@ def find_free_port() -> int:
         return port
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Finance API local server")
+    parser.add_argument(
+        "--uds",
+        metavar="PATH",
+        help="serve over unix domain socket at PATH instead of a tcp port",
+    )
+    return parser.parse_args()
+
+
 def main():
-    port = find_free_port()
+    args = parse_args()
 
-    # Print port info in a format that can be easily parsed
-    print(f"PORT={port}")
+    # Print address info in a format that can be easily parsed
+    if args.uds is not None:
+        address = {"uds": args.uds}
+        print(f"SOCKET={args.uds}", flush=True)
+    else:
+        port = find_free_port()
+        address = {"host": "localhost", "port": port}
+        print(f"PORT={port}", flush=True)
 
     # Start the server on localhost with disabled logging
     uvicorn.run(
         app,
-        host="localhost",
-        port=port,
+        **address,
+        # fastest event loop and http parser when installed
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "auto",
+        http="httptools" if importlib.util.find_spec("httptools") else "auto",
         log_level="critical",  # Most minimal logging
         access_log=False,  # Disable access logs
     )
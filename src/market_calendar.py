@@ -0,0 +1,199 @@
+"""
+US equity market calendar with session times, holidays and half-days.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.0
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import cache
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+JUNETEENTH_FIRST_YEAR = 2022
+
+
+@dataclass(frozen=True)
+class Session:
+    """
+    Regular trading session of a day, open and close are exchange local.
+    """
+
+    date: date
+    open: datetime
+    close: datetime
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    Gets the nth weekday (Monday is 0) of month, negative n counts from the end.
+    """
+
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + (n - 1) * 7)
+
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    last = next_month - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7 + (-n - 1) * 7)
+
+
+def _easter(year: int) -> date:
+    """
+    Gets western easter sunday with the anonymous gregorian algorithm.
+    """
+
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(holiday: date) -> date:
+    """
+    Moves saturday holidays to friday and sunday holidays to monday.
+    """
+
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+
+@cache
+def holidays(year: int) -> frozenset[date]:
+    """
+    Gets full day market holidays of year.
+    """
+
+    days = {
+        _nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),  # Memorial Day
+        _observed(date(year, 7, 4)),  # Independence Day
+        _nth_weekday(year, 9, 0, 1),  # Labor Day
+        _nth_weekday(year, 11, 3, 4),  # Thanksgiving Day
+        _observed(date(year, 12, 25)),  # Christmas Day
+    }
+
+    # saturday new year is not observed on the previous year's last friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+
+    if year >= JUNETEENTH_FIRST_YEAR:
+        days.add(_observed(date(year, 6, 19)))
+
+    return frozenset(days)
+
+
+@cache
+def early_closes(year: int) -> frozenset[date]:
+    """
+    Gets half-days of year when the market closes at 13:00.
+    """
+
+    candidates = [
+        date(year, 7, 3),  # day before Independence Day
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),  # day after Thanksgiving
+        date(year, 12, 24),  # Christmas Eve
+    ]
+    return frozenset(day for day in candidates if is_trading_day(day))
+
+
+def is_trading_day(day: date) -> bool:
+    """
+    Checks if the market opens on day.
+    """
+
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def session(day: date) -> Session | None:
+    """
+    Gets regular session of day, None if the market is closed.
+    """
+
+    if not is_trading_day(day):
+        return None
+
+    close = EARLY_CLOSE if day in early_closes(day.year) else SESSION_CLOSE
+    return Session(
+        date=day,
+        open=datetime.combine(day, SESSION_OPEN, tzinfo=EXCHANGE_TZ),
+        close=datetime.combine(day, close, tzinfo=EXCHANGE_TZ),
+    )
+
+
+def now() -> datetime:
+    """
+    Gets current exchange local datetime.
+    """
+
+    return datetime.now(EXCHANGE_TZ)
+
+
+def is_session_complete(day: date, at: datetime | None = None) -> bool:
+    """
+    Checks if the daily bar of day is final, i.e. its session has closed.
+
+    Args:
+        day (date): exchange local date of the bar
+        at (datetime | None): aware datetime to check at, defaults to now
+
+    Returns:
+        bool: False if the session of day has not closed yet
+    """
+
+    at = (at or now()).astimezone(EXCHANGE_TZ)
+    day_session = session(day)
+    if day_session is None:
+        return day <= at.date()
+    return at >= day_session.close
+
+
+def next_boundary(at: datetime | None = None) -> datetime:
+    """
+    Gets the next session open or close strictly after at.
+
+    Args:
+        at (datetime | None): aware datetime to start from, defaults to now
+
+    Returns:
+        datetime: exchange local datetime of the next open or close
+    """
+
+    at = (at or now()).astimezone(EXCHANGE_TZ)
+    day = at.date()
+    while True:
+        day_session = session(day)
+        if day_session is not None:
+            if at < day_session.open:
+                return day_session.open
+            if at < day_session.close:
+                return day_session.close
+        day += timedelta(days=1)
+
+
+def seconds_until_next_boundary(at: datetime | None = None) -> float:
+    """
+    Gets seconds until the next session open or close, used as cache ttl.
+    """
+
+    at = at or now()
+    return (next_boundary(at) - at).total_seconds()
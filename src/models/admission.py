@@ -0,0 +1,41 @@
+"""
+Admission control related models.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.0
+"""
+
+from enum import Enum
+from pydantic import BaseModel, Field
+
+
+class RequestClass(Enum):
+    """
+    Priority class of an endpoint, interactive requests get the larger share.
+    """
+
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+
+
+class QueueWaitStats(BaseModel):
+    """
+    Queue wait of recently admitted requests of a class, in seconds.
+    """
+
+    count: int
+    p50: float
+    p99: float
+    max: float
+    queued: int
+
+
+class AdmissionMetrics(BaseModel):
+    """
+    Admission control state of the worker serving the request.
+    """
+
+    in_flight: int = Field(serialization_alias="inFlight")
+    rejected: int
+    classes: dict[RequestClass, QueueWaitStats]
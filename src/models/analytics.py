@@ -0,0 +1,53 @@
+"""
+Analytics APIs related models.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.0
+"""
+
+from enum import Enum
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class AnalyticsMetric(Enum):
+    """
+    Metric returned as table by plain and csv analytics responses.
+    """
+
+    SUMMARY = "summary"
+    RETURNS = "returns"
+    ROLLING_VOLATILITY = "rolling_volatility"
+    CORRELATION = "correlation"
+    COVARIANCE = "covariance"
+
+
+class TickerStats(BaseModel):
+    """
+    Performance and risk stats of one ticker over the aligned date range.
+    """
+
+    ticker: str
+    total_return: float | None = Field(serialization_alias="totalReturn")
+    # annualized standard deviation of daily returns
+    volatility: float | None
+    # annualized volatility of the last rolling window
+    rolling_volatility: float | None = Field(serialization_alias="rollingVolatility")
+    # against the benchmark ticker
+    beta: float | None
+
+
+class AnalyticsReport(BaseModel):
+    """
+    Multi-ticker comparison report, matrices follow the order of tickers.
+    """
+
+    tickers: list[str]
+    benchmark: str
+    start: datetime
+    end: datetime
+    stats: list[TickerStats]
+    correlation: list[list[float | None]]
+    # annualized covariance of daily returns
+    covariance: list[list[float | None]]
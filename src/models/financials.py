@@ -3,11 +3,11 @@ Financials APIs related models.
 
 Author: tigerding
 Email: zhiyuanding01@gmail.com
-Version: 0.3.0
+Version: 0.4.0
 """
 
 from enum import Enum
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, create_model
 from datetime import datetime
 
 
@@ -103,6 +103,51 @@ class StockMetaInfo(BaseModel):
     eps_surprise: float | None = Field(serialization_alias="epsSurprise")
 
 
+class MetaInfoSource(Enum):
+    """
+    Upstream source stock meta info fields are fetched from.
+    """
+
+    YAHOO_INFO = "yahoo_info"
+    YAHOO_CALENDAR = "yahoo_calendar"
+    FINVIZ = "finviz"
+
+
+# source of every StockMetaInfo field, requesting only some fields skips the rest
+STOCK_METAINFO_SOURCES: dict[str, MetaInfoSource] = {
+    **{
+        name: MetaInfoSource.YAHOO_INFO
+        for name in StockMetaInfo.model_fields
+        if name
+        not in (
+            "earnings_date",
+            "index_participation",
+            "eps_yearly_growth_ttm",
+            "eps_quarterly_growth_yoy",
+            "eps_surprise",
+        )
+    },
+    "earnings_date": MetaInfoSource.YAHOO_CALENDAR,
+    "index_participation": MetaInfoSource.FINVIZ,
+    "eps_yearly_growth_ttm": MetaInfoSource.FINVIZ,
+    "eps_quarterly_growth_yoy": MetaInfoSource.FINVIZ,
+    "eps_surprise": MetaInfoSource.FINVIZ,
+}
+
+
+# StockMetaInfo with every field optional, for sparse field selections
+PartialStockMetaInfo = create_model(
+    "PartialStockMetaInfo",
+    **{
+        name: (
+            field.annotation | None,
+            Field(None, serialization_alias=field.serialization_alias),
+        )
+        for name, field in StockMetaInfo.model_fields.items()
+    },
+)
+
+
 class NewsRecord(BaseModel):
     """
     News record type, matches frontend.
@@ -3,7 +3,7 @@ History API related models.
 
 Author: tigerding
 Email: zhiyuanding01@gmail.com
-Version: 0.1.1
+Version: 0.2.0
 """
 
 from enum import Enum
@@ -29,6 +29,21 @@ class Period(Enum):
     MAX = "max"
 
 
+class IntradayInterval(Enum):
+    """
+    Valid intervals for intraday data.
+    """
+
+    ONE_MIN = "1m"
+    FIVE_MIN = "5m"
+    FIFTEEN_MIN = "15m"
+    HOUR = "1h"
+
+    @property
+    def minutes(self) -> int:
+        return {"1m": 1, "5m": 5, "15m": 15, "1h": 60}[self.value]
+
+
 class StockPriceRecord(BaseModel):
     """
     Stock price record type, matches frontend.
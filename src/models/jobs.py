@@ -0,0 +1,76 @@
+"""
+Export job APIs related models.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.1
+"""
+
+from enum import Enum
+from pydantic import BaseModel, Field, field_validator
+
+from models.financials import StatementType
+from models.history import Period
+
+
+class ExportDataset(Enum):
+    """
+    Datasets an export job can write.
+    """
+
+    HISTORY = "history"
+    INCOME = "income"
+    CASHFLOW = "cashflow"
+    BALANCE = "balance"
+    METAINFO = "metainfo"
+
+
+class ExportJobState(Enum):
+    """
+    Lifecycle state of an export job.
+    """
+
+    RUNNING = "running"
+    COMPLETED = "completed"
+
+
+class ExportJobRequest(BaseModel):
+    """
+    Universe and datasets to export.
+    """
+
+    tickers: list[str] = Field(min_length=1)
+    datasets: list[ExportDataset] = Field(min_length=1)
+    period: Period = Period.MAX
+    statement_type: StatementType = Field(
+        StatementType.YEARLY, serialization_alias="statementType"
+    )
+
+    @field_validator("tickers")
+    @classmethod
+    def normalize_tickers(cls, tickers: list[str]) -> list[str]:
+        # tickers name partition directories, every unit must be unique
+        normalized = [ticker.strip().upper() for ticker in tickers]
+        invalid = [ticker for ticker in normalized if not ticker or "/" in ticker]
+        if invalid:
+            raise ValueError(f"invalid tickers {invalid}")
+        return list(dict.fromkeys(normalized))
+
+    @field_validator("datasets")
+    @classmethod
+    def dedupe_datasets(cls, datasets: list[ExportDataset]) -> list[ExportDataset]:
+        return list(dict.fromkeys(datasets))
+
+
+class ExportJobStatus(BaseModel):
+    """
+    Progress of an export job, one unit is one dataset of one ticker.
+    """
+
+    id: str
+    state: ExportJobState
+    total: int
+    completed: int
+    # unit ("dataset/ticker") -> error of its last attempt
+    failed: dict[str, str]
+    path: str
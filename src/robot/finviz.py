@@ -1,21 +1,35 @@
 """
 Finviz backend implemeneted with web scraping.
 
+Html parsing is cpu bound, it runs in a parser pool off the event loop and
+only the extracted values are sent back.
+
 Author: tigerding
 Email: zhiyuanding01@gmail.com
-Version: 0.3.0
+Version: 0.5.1
 """
 
-import pandas as pd
-import aiohttp
-from bs4 import BeautifulSoup
-from utils import get_url_origin
-from datetime import datetime
-import pytz
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import cache
+from typing import Any, Callable
+
+import market_calendar
+import settings
+from robot import session
+from utils import get_url_origin, lazy_import
+
+pd = lazy_import("pandas")
+bs4 = lazy_import("bs4")
 
 FINVIZ_BASE_URL = "https://finviz.com/"
 FINVIZ_STOCK_URL = f"{FINVIZ_BASE_URL}/quote.ashx"
 
+NEWS_DATE_FORMAT = "%b-%d-%y %I:%M%p"
+
 CHROME_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36"
 
 
@@ -23,38 +37,64 @@ class ElementNotFoundError(Exception):
     pass
 
 
-async def parse_stock_page(ticker: str) -> BeautifulSoup:
+@cache
+def get_parser_pool() -> Executor:
+    """
+    Gets bounded pool html is parsed in, created on first use.
     """
-    Gets parsed html page contents for stock from finviz.com.
 
-    Args:
-        ticker (str): stock ticker symbol
+    if settings.PARSER_POOL == "thread":
+        return ThreadPoolExecutor(settings.PARSER_WORKERS)
 
-    Returns:
-       BeautifulSoup: parsed html page
+    # spawn, forking a worker that runs threads is unsafe
+    return ProcessPoolExecutor(
+        settings.PARSER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def shutdown_parser_pool():
+    """
+    Shuts down the parser pool if it was created.
     """
-    async with aiohttp.ClientSession() as session:
-        response = await session.get(
-            FINVIZ_STOCK_URL,
-            params={"t": ticker},
-            headers={"User-Agent": CHROME_USER_AGENT},
-        )
-        content = await response.text()
-        return BeautifulSoup(content, "lxml")
 
+    if get_parser_pool.cache_info().currsize:
+        get_parser_pool().shutdown(cancel_futures=True)
+        get_parser_pool.cache_clear()
 
-async def get_tags(ticker: str) -> pd.DataFrame:
+
+async def run_parser(func: Callable[..., Any], *args) -> Any:
+    """
+    Runs parsing function in the parser pool without blocking the event loop.
     """
-    Gets tags for stock from finviz.com.
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_parser_pool(), func, *args)
+
+
+async def fetch_stock_page(ticker: str) -> str:
+    """
+    Gets html page contents for stock from finviz.com.
 
     Args:
         ticker (str): stock ticker symbol
 
     Returns:
-        pd.DataFrame: pandas DataFrame of stock tags
+       str: raw html page
+    """
+    async with session.get_session().get(
+        FINVIZ_STOCK_URL,
+        params={"t": ticker},
+        headers={"User-Agent": CHROME_USER_AGENT},
+    ) as response:
+        return await response.text()
+
+
+def parse_tags(content: str) -> list[dict[str, str]]:
+    """
+    Extracts tags from stock page, runs in the parser pool.
     """
 
-    page = await parse_stock_page(ticker)
+    page = bs4.BeautifulSoup(content, "lxml")
     tags_container = page.select_one(".quote-links div")
     if not tags_container:
         raise ElementNotFoundError("Tags container not found")
@@ -63,22 +103,31 @@ async def get_tags(ticker: str) -> pd.DataFrame:
     if len(tags) == 0:
         raise ElementNotFoundError("Tags not found")
 
-    tag_links = [
+    return [
         {"Name": tag.text, "Link": f"{FINVIZ_BASE_URL}{tag.get("href")}"}
         for tag in tags
     ]
-    return pd.DataFrame(tag_links)
 
 
-async def get_partial_metainfo_finviz(ticker: str) -> pd.DataFrame:
+async def get_tags(ticker: str) -> pd.DataFrame:
     """
-    Gets partial metainfo for stock using finviz.
+    Gets tags for stock from finviz.com.
 
     Args:
         ticker (str): stock ticker symbol
 
     Returns:
-        pd.DataFrame: pandas DataFrame of partial metainfo
+        pd.DataFrame: pandas DataFrame of stock tags
+    """
+
+    content = await fetch_stock_page(ticker)
+    tag_links = await run_parser(parse_tags, content)
+    return pd.DataFrame(tag_links)
+
+
+def parse_partial_metainfo(content: str) -> dict[str, Any]:
+    """
+    Extracts partial metainfo from stock page, runs in the parser pool.
     """
 
     target_labels = {
@@ -102,38 +151,50 @@ async def get_partial_metainfo_finviz(ticker: str) -> pd.DataFrame:
 
     metainfo_dict = {target_labels[label]["name"]: None for label in target_labels}
 
-    try:
-        page = await parse_stock_page(ticker)
-        metainfo_table_elem = page.select_one(".js-snapshot-table")
-        if not metainfo_table_elem:
-            raise ElementNotFoundError("Metainfo table not found")
+    page = bs4.BeautifulSoup(content, "lxml")
+    metainfo_table_elem = page.select_one(".js-snapshot-table")
+    if not metainfo_table_elem:
+        return metainfo_dict
 
-        metainfo_table_cells = metainfo_table_elem.select("td")
-        for i in range(0, len(metainfo_table_cells), 2):
-            label = metainfo_table_cells[i].text
-            if label in target_labels:
-                key = target_labels[label]["name"]
-                callback = target_labels[label]["callback"]
-                metainfo_dict[key] = callback(metainfo_table_cells[i + 1].text)
+    metainfo_table_cells = metainfo_table_elem.select("td")
+    for i in range(0, len(metainfo_table_cells), 2):
+        label = metainfo_table_cells[i].text
+        if label in target_labels:
+            key = target_labels[label]["name"]
+            callback = target_labels[label]["callback"]
+            metainfo_dict[key] = callback(metainfo_table_cells[i + 1].text)
 
-    except ElementNotFoundError:
-        pass
-
-    return pd.DataFrame.from_dict(metainfo_dict, orient="index", columns=["Value"])
+    return metainfo_dict
 
 
-async def get_news(ticker: str) -> pd.DataFrame:
+async def get_partial_metainfo_finviz(ticker: str) -> pd.DataFrame:
     """
-    Gets news list for stock using finviz.
+    Gets partial metainfo for stock using finviz.
 
     Args:
         ticker (str): stock ticker symbol
 
     Returns:
-        pd.DataFrame: pandas DataFrame of news list
+        pd.DataFrame: pandas DataFrame of partial metainfo
+    """
+
+    content = await fetch_stock_page(ticker)
+    metainfo_dict = await run_parser(parse_partial_metainfo, content)
+    return pd.DataFrame.from_dict(metainfo_dict, orient="index", columns=["Value"])
+
+
+def parse_news(
+    content: str, known_links: set[str] | None
+) -> tuple[list[dict[str, Any]], list[str]]:
     """
+    Extracts news from stock page, runs in the parser pool.
 
-    page = await parse_stock_page(ticker)
+    Returns:
+        tuple[list[dict[str, Any]], list[str]]: news whose "Date" is the
+            position of their raw date in the date list of every row
+    """
+
+    page = bs4.BeautifulSoup(content, "lxml")
     news_table_elem = page.select_one(".news-table")
     if not news_table_elem:
         raise ElementNotFoundError("News table not found")
@@ -141,16 +202,20 @@ async def get_news(ticker: str) -> pd.DataFrame:
     news_table_rows = news_table_elem.select("tr")
 
     news_list = []
+    news_dates = []  # dates of every row, skipped rows may carry the day
     for row in news_table_rows:
         cells = row.select("td")
         if len(cells) != 2:
             continue
+        news_dates.append(cells[0].text.strip())
 
         title_link = cells[1].select_one("a.tab-link-news")
         if not title_link:
             continue  # simply skip loading ones
         title = title_link.text.strip()
         link = str(title_link.get("href"))
+        if known_links is not None and link in known_links:
+            break  # news are sorted from newest, the rest are seen too
         thumb_img_src = f"{get_url_origin(link)}/favicon.ico"
 
         publisher = cells[1].select_one(".news-link-right")
@@ -163,7 +228,7 @@ async def get_news(ticker: str) -> pd.DataFrame:
 
         news_list.append(
             {
-                "Date": cells[0].text.strip(),
+                "Date": len(news_dates) - 1,
                 "Title": title,
                 "Link": link,
                 "Publisher": publisher_name,
@@ -171,17 +236,34 @@ async def get_news(ticker: str) -> pd.DataFrame:
             }
         )
 
-    # pad dates
-    for i, news in enumerate(news_list):
-        if news["Date"][0].isdigit():
-            news["Date"] = f"{news_list[i-1]['Date'].split(' ')[0]} {news['Date']}"
-        elif news["Date"].startswith("Today"):
-            timezone = pytz.timezone("US/Eastern")
-            today_date = datetime.now(timezone).strftime("%b-%d-%y")
-            news["Date"] = news["Date"].replace("Today", today_date)
+    return news_list, news_dates
+
+
+async def get_news(ticker: str, known_links: set[str] | None = None) -> pd.DataFrame:
+    """
+    Gets news list for stock using finviz.
+
+    Args:
+        ticker (str): stock ticker symbol
+        known_links (set[str] | None): links already seen, parsing stops at the first one
+
+    Returns:
+        pd.DataFrame: pandas DataFrame of news list
+    """
+
+    content = await fetch_stock_page(ticker)
+    news_list, news_dates = await run_parser(parse_news, content, known_links)
+
+    # pad dates, rows of the same day only show time
+    date_parts = pd.Series(news_dates, dtype=object).str.split(" ")
+    days = date_parts.str[0].where(date_parts.str.len() == 2)
+    days = days.replace("Today", market_calendar.now().strftime("%b-%d-%y")).ffill()
 
-    # parse dates
-    for news in news_list:
-        news["Date"] = datetime.strptime(news["Date"], "%b-%d-%y %I:%M%p")
+    # parse dates in one pass
+    dates = pd.to_datetime(days + " " + date_parts.str[-1], format=NEWS_DATE_FORMAT)
 
-    return pd.DataFrame(news_list)
+    df = pd.DataFrame(
+        news_list, columns=["Date", "Title", "Link", "Publisher", "Thumb Img Src"]
+    )
+    df["Date"] = dates.iloc[df["Date"]].to_numpy()
+    return df
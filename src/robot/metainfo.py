@@ -0,0 +1,59 @@
+"""
+Stock meta info combined from the yahoo and finviz backends.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.0
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from models.financials import STOCK_METAINFO_SOURCES, MetaInfoSource
+from robot import finviz, yahoo
+from utils import convert_keys, lazy_import
+
+pd = lazy_import("pandas")
+
+
+async def get_metainfo(ticker: str, fields: list[str] | None = None) -> pd.DataFrame:
+    """
+    Gets stock meta info for ticker.
+
+    Args:
+        ticker (str): stock ticker symbol
+        fields (list[str] | None): StockMetaInfo fields to keep, only the
+            sources they come from are fetched
+
+    Returns:
+        pd.DataFrame: meta info values in column "Value", indexed by label
+
+    Raises:
+        Exceptions if any error occurs.
+    """
+
+    # only fetch sources a requested field comes from
+    sources = (
+        {STOCK_METAINFO_SOURCES[field] for field in fields}
+        if fields is not None
+        else set(MetaInfoSource)
+    )
+
+    async def get_earnings_date() -> pd.DataFrame:
+        earnings_date = await yahoo.get_earnings_date(ticker)
+        return pd.DataFrame([earnings_date], index=["Earnings Date"], columns=["Value"])
+
+    source_funcs = {
+        MetaInfoSource.YAHOO_INFO: lambda: yahoo.get_partial_metainfo_yahoo(ticker),
+        MetaInfoSource.FINVIZ: lambda: finviz.get_partial_metainfo_finviz(ticker),
+        MetaInfoSource.YAHOO_CALENDAR: get_earnings_date,
+    }
+    dfs = await asyncio.gather(
+        *[func() for source, func in source_funcs.items() if source in sources]
+    )
+    df = pd.concat(dfs)
+
+    if fields is not None:
+        df = df[[key in fields for key in convert_keys(df.index.tolist())]]
+    return df
@@ -0,0 +1,41 @@
+"""
+Pooled aiohttp session shared by the scraping backends.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.0
+"""
+
+from __future__ import annotations
+
+import settings
+from utils import lazy_import
+
+aiohttp = lazy_import("aiohttp")
+
+_session: aiohttp.ClientSession | None = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Gets http session of this worker, connections are reused across requests.
+    """
+
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=settings.HTTP_POOL_SIZE),
+            timeout=aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT),
+        )
+    return _session
+
+
+async def close_session():
+    """
+    Closes the shared session if it was created.
+    """
+
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
@@ -1,19 +1,40 @@
 """
-Yahoo backend implemeneted with yfinance.
+Yahoo backend implemeneted with yfinance, hot paths optionally use robot.yahoo_native.
 
 Author: tigerding
 Email: zhiyuanding01@gmail.com
-Version: 0.7.2
+Version: 0.10.0
 """
 
+from __future__ import annotations
+
 import asyncio
-import yfinance as yf
-import pandas as pd
 from datetime import datetime
 from contextlib import redirect_stderr
 
+import market_calendar
+import settings
+from cache import CompactBars, HistoryCache
 from models.history import Period
 from models.financials import StatementType
+from robot import yahoo_native
+from utils import lazy_import
+
+yf = lazy_import("yfinance")
+pd = lazy_import("pandas")
+
+history_cache = HistoryCache(settings.HISTORY_CACHE_MAX_BYTES)
+
+
+def history_ttl(interval: str) -> float:
+    """
+    Gets seconds history of interval stays valid, until the next session boundary.
+    """
+
+    ttl = market_calendar.seconds_until_next_boundary()
+    if interval[-1] in ("m", "h"):  # intraday bars keep coming during session
+        ttl = min(ttl, settings.INTRADAY_CACHE_TTL)
+    return ttl
 
 
 async def get_history(
@@ -39,6 +60,11 @@ async def get_history(
         Exceptions if any error occurs.
     """
 
+    cache_key = (ticker.upper(), interval, period, start, end)
+    bars = history_cache.get(cache_key)
+    if bars is not None:
+        return bars.to_frame()
+
     # adapter of yahoo finance
     history_func = lambda: yf.Ticker(ticker).history(
         period=period.value if period is not None else None,
@@ -48,14 +74,20 @@ async def get_history(
         raise_errors=True,
     )
 
-    # wrap inside asyncio.to_thread to make non-blocking
-    df = await asyncio.to_thread(history_func)
+    if settings.YAHOO_BACKEND == "native":
+        df = await yahoo_native.get_history(ticker, interval, period, start, end)
+    else:
+        # wrap inside asyncio.to_thread to make non-blocking
+        df = await asyncio.to_thread(history_func)
+
+    # drop daily bar of the running session, it is still partial
     last_date = df.index[-1]
-    today = pd.Timestamp.now(tz="US/Eastern").normalize()
-    if last_date == today:
+    if interval == "1d" and not market_calendar.is_session_complete(last_date.date()):
         df.drop(last_date, inplace=True)
 
-    return df
+    bars = CompactBars.from_frame(df)
+    history_cache.put(cache_key, bars, history_ttl(interval))
+    return bars.to_frame()
 
 
 async def get_income_statement(ticker: str, type: StatementType) -> pd.DataFrame:
@@ -181,7 +213,10 @@ async def get_partial_metainfo_yahoo(ticker: str) -> pd.DataFrame:
         pd.DataFrame: pandas DataFrame of partial metainfo
     """
 
-    metainfo_yf = await asyncio.to_thread(lambda: yf.Ticker(ticker).info)
+    if settings.YAHOO_BACKEND == "native":
+        metainfo_yf = await yahoo_native.get_info(ticker)
+    else:
+        metainfo_yf = await asyncio.to_thread(lambda: yf.Ticker(ticker).info)
     metainfo_dict = {
         "Ticker": metainfo_yf["symbol"],
         "Full Name": metainfo_yf["longName"],
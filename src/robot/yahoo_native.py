@@ -0,0 +1,274 @@
+"""
+Yahoo backend implemented with asyncio on the pooled aiohttp session.
+
+Serves the hot paths of robot.yahoo without a thread per request, chart json
+is parsed straight into numpy arrays. Enabled with YAHOO_BACKEND=native.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.2
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from datetime import datetime
+from typing import Any, Callable
+
+import market_calendar
+import settings
+from models.history import Period
+from robot import session
+from utils import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+CHART_URL = f"{settings.YAHOO_BASE_URL}/v8/finance/chart/{{ticker}}"
+QUOTE_SUMMARY_URL = f"{settings.YAHOO_BASE_URL}/v10/finance/quoteSummary/{{ticker}}"
+CRUMB_URL = f"{settings.YAHOO_BASE_URL}/v1/test/getcrumb"
+
+QUOTE_SUMMARY_MODULES = [
+    "price",
+    "summaryProfile",
+    "summaryDetail",
+    "defaultKeyStatistics",
+    "financialData",
+]
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+CHROME_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36"
+
+
+class YahooError(Exception):
+    pass
+
+
+_crumb: str | None = None
+_crumb_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def _get_json(url: str, params: dict[str, Any]) -> dict[str, Any]:
+    async with session.get_session().get(
+        url, params=params, headers={"User-Agent": CHROME_USER_AGENT}
+    ) as response:
+        if response.status == 401:
+            raise PermissionError(f"unauthorized {url}")
+        return await response.json(content_type=None)
+
+
+async def _get_crumb(stale: str | None = None) -> str:
+    """
+    Gets crumb authorizing quote summary requests, the cookie it is bound to
+    lives in the shared session cookie jar.
+
+    Args:
+        stale (str | None): crumb yahoo rejected, replaced unless another
+            request already did
+
+    Raises:
+        YahooError if yahoo does not issue a crumb.
+    """
+
+    global _crumb
+    # one request fetches the crumb, concurrent ones wait and reuse it
+    loop = asyncio.get_running_loop()
+    lock = _crumb_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        if _crumb is None or _crumb == stale:
+            http_session = session.get_session()
+            headers = {"User-Agent": CHROME_USER_AGENT}
+            async with http_session.get(settings.YAHOO_COOKIE_URL, headers=headers):
+                pass  # only sets the cookie, responds with 404
+            async with http_session.get(CRUMB_URL, headers=headers) as response:
+                crumb = await response.text()
+                if response.status != 200 or not crumb:
+                    raise YahooError(f"no crumb issued, status {response.status}")
+            _crumb = crumb
+        return _crumb
+
+
+def _bar_index(timestamps: np.ndarray, tz: str, interval: str) -> pd.DatetimeIndex:
+    """
+    Converts epoch seconds into exchange local index, daily bars at midnight.
+    """
+
+    index = pd.to_datetime(timestamps, unit="s", utc=True).tz_convert(tz)
+    if interval[-1] not in ("m", "h"):
+        index = index.normalize()
+    return index
+
+
+def _event_column(
+    events: dict[str, dict[str, Any]] | None,
+    value: Callable[[dict[str, Any]], float],
+    index: pd.DatetimeIndex,
+    tz: str,
+    interval: str,
+) -> np.ndarray:
+    """
+    Aligns dividend or split events onto bar index, 0 where no event.
+    """
+
+    column = np.zeros(len(index))
+    if not events:
+        return column
+
+    timestamps = np.fromiter((int(ts) for ts in events), dtype=np.int64)
+    values = np.fromiter((value(event) for event in events.values()), dtype=np.float64)
+    event_dates = _bar_index(timestamps, tz, interval).asi8
+
+    # events fall on bar dates, both sorted by time
+    positions = np.searchsorted(index.asi8, event_dates)
+    on_bar = positions < len(index)
+    on_bar[on_bar] = index.asi8[positions[on_bar]] == event_dates[on_bar]
+    np.add.at(column, positions[on_bar], values[on_bar])
+    return column
+
+
+def parse_chart(chart: dict[str, Any], interval: str) -> pd.DataFrame:
+    """
+    Parses chart json into DataFrame in the layout of yfinance history.
+
+    Raises:
+        YahooError if yahoo returns an error or no bars.
+    """
+
+    error = chart["chart"].get("error")
+    if error:
+        raise YahooError(error.get("description", error))
+
+    result = chart["chart"]["result"][0]
+    timestamps = np.asarray(result.get("timestamp", []), dtype=np.int64)
+    if len(timestamps) == 0:
+        raise YahooError("no price data found")
+
+    tz = result["meta"]["exchangeTimezoneName"]
+    index = _bar_index(timestamps, tz, interval)
+    index.name = "Date" if interval[-1] not in ("m", "h") else "Datetime"
+
+    # json null becomes nan when converted as float64
+    quote = result["indicators"]["quote"][0]
+    prices = {
+        column.capitalize(): np.asarray(quote[column], dtype=np.float64)
+        for column in PRICE_COLUMNS
+    }
+    volume = np.asarray(quote["volume"], dtype=np.float64)
+
+    # adjust like yfinance auto_adjust, intraday bars come without adjclose
+    adjclose = result["indicators"].get("adjclose")
+    if adjclose:
+        ratio = np.asarray(adjclose[0]["adjclose"], dtype=np.float64) / prices["Close"]
+        prices = {column: values * ratio for column, values in prices.items()}
+
+    events = result.get("events", {})
+    df = pd.DataFrame(
+        {
+            **prices,
+            "Volume": np.nan_to_num(volume).astype(np.int64),
+            "Dividends": _event_column(
+                events.get("dividends"), lambda e: e["amount"], index, tz, interval
+            ),
+            "Stock Splits": _event_column(
+                events.get("splits"),
+                lambda e: e["numerator"] / e["denominator"],
+                index,
+                tz,
+                interval,
+            ),
+        },
+        index=index,
+    )
+
+    # yahoo repeats the running bar and pads missing bars with nulls
+    has_price = ~np.isnan(np.column_stack(list(prices.values()))).all(axis=1)
+    keep = has_price & ~index.duplicated(keep="last")
+    return df if keep.all() else df[keep]
+
+
+async def get_history(
+    ticker: str,
+    interval: str = "1d",
+    period: Period | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> pd.DataFrame:
+    """
+    Gets historical data for ticker from the yahoo chart api.
+
+    Args:
+        ticker (str): stock ticker symbol
+        interval (str): bar interval
+        period (Period | None): period to query
+        start (datetime | None): start datetime, exchange local if naive
+        end (datetime | None): end datetime, exchange local if naive
+
+    Returns:
+        pd.DataFrame: pandas DataFrame of historical data
+
+    Raises:
+        Exceptions if any error occurs.
+    """
+
+    def epoch(at: datetime) -> int:
+        # naive datetimes are exchange local like in yfinance
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=market_calendar.EXCHANGE_TZ)
+        return int(at.timestamp())
+
+    params = {"interval": interval, "events": "div,splits", "includePrePost": "false"}
+    if start is not None or end is not None:
+        params["period1"] = epoch(start) if start is not None else 0
+        params["period2"] = epoch(end or market_calendar.now())
+    else:
+        params["range"] = period.value if period is not None else Period.MONTH.value
+
+    chart = await _get_json(CHART_URL.format(ticker=ticker), params)
+    return parse_chart(chart, interval)
+
+
+def _flatten_quote_summary(quote_summary: dict[str, Any]) -> dict[str, Any]:
+    """
+    Flattens quote summary modules into one dict keyed like yfinance info.
+    """
+
+    error = quote_summary["quoteSummary"].get("error")
+    if error:
+        raise YahooError(error.get("description", error))
+
+    info = {}
+    for module in quote_summary["quoteSummary"]["result"][0].values():
+        for key, value in module.items():
+            if isinstance(value, dict):
+                value = value.get("raw")  # {"raw": 1.0, "fmt": "1.00"} or {}
+            if key not in info or info[key] is None:
+                info[key] = value
+    return info
+
+
+async def get_info(ticker: str) -> dict[str, Any]:
+    """
+    Gets ticker info with the same keys as yfinance Ticker.info.
+
+    Args:
+        ticker (str): stock ticker symbol
+
+    Returns:
+        dict[str, Any]: info of ticker
+    """
+
+    url = QUOTE_SUMMARY_URL.format(ticker=ticker)
+    params = {"modules": ",".join(QUOTE_SUMMARY_MODULES)}
+    crumb = await _get_crumb()
+    try:
+        quote_summary = await _get_json(url, {**params, "crumb": crumb})
+    except PermissionError:
+        # crumb expired with its cookie
+        crumb = await _get_crumb(stale=crumb)
+        quote_summary = await _get_json(url, {**params, "crumb": crumb})
+
+    return _flatten_quote_summary(quote_summary)
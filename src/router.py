@@ -3,28 +3,57 @@ Fastapi router file.
 
 Author: tigerding
 Email: zhiyuanding01@gmail.com
-Version: 0.9.2
+Version: 0.16.3
 """
 
-from fastapi import APIRouter
+import asyncio
+from fastapi import APIRouter, Query, Request, Response
 from fastapi.responses import PlainTextResponse
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import ValidationError
 
-from robot import yahoo, finviz
+import market_calendar
+import settings
+import tasks
+from robot import yahoo, finviz, metainfo
 from robot.finviz import ElementNotFoundError
+from admission import (
+    QuotaExceededError,
+    admission_controller,
+    client_id,
+    export_job_cost,
+)
+from analytics import align_closes, compute_analytics
+from cache import widen_prices
+from store.intraday import aggregate_bars
+from store.news import InvalidCursorError
 
 from models import ResponseType
-from models.history import Period, StockPriceRecord
+from models.history import IntradayInterval, Period, StockPriceRecord
+from models.admission import AdmissionMetrics
+from models.jobs import ExportJobRequest, ExportJobStatus
+from models.analytics import AnalyticsMetric, AnalyticsReport, TickerStats
 from models.financials import (
     StatementType,
     SECFilingRecord,
     TagInfo,
     StockMetaInfo,
+    PartialStockMetaInfo,
+    STOCK_METAINFO_SOURCES,
     NewsRecord,
 )
 
-from utils import forge_csv_response, convert_keys, internal_error, bad_request
+from utils import (
+    forge_csv_response,
+    convert_keys,
+    internal_error,
+    bad_request,
+    not_found,
+    too_many_requests,
+    lazy_import,
+)
+
+pd = lazy_import("pandas")
 
 router = APIRouter()
 
@@ -65,6 +94,7 @@ async def get_history(
     if type is ResponseType.MODEL:
         # use number as index instead of date
         # so date can be parsed in row
+        df = widen_prices(df)
         df.reset_index(inplace=True)
         rename_dict = {
             "Date": "date",
@@ -84,17 +114,49 @@ async def get_history(
 
 
 @router.get("/intraday/{ticker}", response_model=list[StockPriceRecord] | str)
-async def get_intraday(ticker: str, type: ResponseType = ResponseType.PLAIN):
+async def get_intraday(
+    ticker: str,
+    start: str | None = None,
+    end: str | None = None,
+    interval: IntradayInterval = IntradayInterval.ONE_MIN,
+    type: ResponseType = ResponseType.PLAIN,
+):
     try:
-        df = await yahoo.get_history(ticker, interval="1m", period=Period.DAY)
-        df.index.name = "Date"
+        start_date = date.fromisoformat(start) if start is not None else None
+        end_date = date.fromisoformat(end) if end is not None else None
+    except ValueError as e:
+        raise bad_request(f"wrong date format {e}")
+
+    if start_date is not None or end_date is not None:
+        end_date = end_date or market_calendar.now().date()
+        start_date = start_date or end_date
+        if start_date > end_date:
+            raise bad_request("start is after end")
+        if (end_date - start_date).days >= settings.INTRADAY_MAX_RANGE_DAYS:
+            raise bad_request(
+                f"at most {settings.INTRADAY_MAX_RANGE_DAYS} days allowed"
+            )
+
+    try:
+        if start_date is None:
+            df = await yahoo.get_history(ticker, interval="1m", period=Period.DAY)
+            df.index.name = "Date"
+        else:
+            # days before yahoo retention only exist in the archive
+            df = await asyncio.to_thread(
+                tasks.get_intraday_archive().read, ticker, start_date, end_date
+            )
     except Exception:
         return [] if type is ResponseType.MODEL else PlainTextResponse()
 
+    if interval is not IntradayInterval.ONE_MIN:
+        df = aggregate_bars(df, interval.minutes)
+
     # if model, convert dataframe to list[model]
     if type is ResponseType.MODEL:
         # use number as index instead of date
         # so date can be parsed in row
+        df = widen_prices(df)
         df.reset_index(inplace=True)
         rename_dict = {
             "Date": "date",
@@ -113,6 +175,78 @@ async def get_intraday(ticker: str, type: ResponseType = ResponseType.PLAIN):
     return forge_csv_response(df, is_file=type is ResponseType.CSV, filename=ticker)
 
 
+@router.get("/analytics", response_model=AnalyticsReport | str)
+async def get_analytics(
+    tickers: str,
+    benchmark: str = "SPY",
+    period: Period = Period.YEAR,
+    window: int = Query(21, gt=1, le=settings.ANALYTICS_MAX_WINDOW),
+    metric: AnalyticsMetric = AnalyticsMetric.SUMMARY,
+    type: ResponseType = ResponseType.PLAIN,
+):
+    benchmark = benchmark.upper()
+    ticker_list = list(
+        dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip())
+    )
+    if len(ticker_list) == 0:
+        raise bad_request("no tickers given")
+    if len(ticker_list) > settings.ANALYTICS_MAX_TICKERS:
+        raise bad_request(f"at most {settings.ANALYTICS_MAX_TICKERS} tickers allowed")
+    if benchmark not in ticker_list:
+        ticker_list.append(benchmark)
+
+    # fetch concurrently, bounded so a large universe does not flood yahoo
+    semaphore = asyncio.Semaphore(settings.ANALYTICS_CONCURRENCY)
+
+    async def fetch(ticker: str):
+        async with semaphore:
+            return await yahoo.get_history(ticker, period=period)
+
+    results = await asyncio.gather(
+        *[fetch(ticker) for ticker in ticker_list], return_exceptions=True
+    )
+    failed = [t for t, r in zip(ticker_list, results) if isinstance(r, Exception)]
+    if failed:
+        raise bad_request(f"no history for {', '.join(failed)}")
+
+    closes = align_closes(dict(zip(ticker_list, results)))
+    if len(closes) < 2:
+        raise bad_request("not enough common trading dates")
+
+    tables = await asyncio.to_thread(compute_analytics, closes, benchmark, window)
+
+    if type is ResponseType.MODEL:
+        # json has no nan, missing stats are null
+        summary, correlation, covariance = (
+            tables[name].astype(object).where(tables[name].notna(), None)
+            for name in ("summary", "correlation", "covariance")
+        )
+        return AnalyticsReport(
+            tickers=ticker_list,
+            benchmark=benchmark,
+            start=closes.index[0],
+            end=closes.index[-1],
+            stats=[
+                TickerStats(
+                    ticker=ticker,
+                    total_return=row["Total Return"],
+                    volatility=row["Volatility"],
+                    rolling_volatility=row["Rolling Volatility"],
+                    beta=row["Beta"],
+                )
+                for ticker, row in summary.iterrows()
+            ],
+            correlation=correlation.values.tolist(),
+            covariance=covariance.values.tolist(),
+        )
+
+    return forge_csv_response(
+        tables[metric.value],
+        is_file=type is ResponseType.CSV,
+        filename=f"analytics_{metric.value}",
+    )
+
+
 # todo: integration with frontend model
 @router.get("/income/{ticker}", response_model=str)
 async def get_income_statement(
@@ -186,28 +320,31 @@ async def get_tags(ticker: str, type: ResponseType = ResponseType.PLAIN):
     )
 
 
-@router.get("/metainfo/{ticker}", response_model=StockMetaInfo | str)
-async def get_metainfo(ticker: str, type: ResponseType = ResponseType.PLAIN):
-    import pandas as pd
+@router.get(
+    "/metainfo/{ticker}",
+    response_model=StockMetaInfo | PartialStockMetaInfo | str,
+    response_model_exclude_unset=True,
+)
+async def get_metainfo(
+    ticker: str, fields: str | None = None, type: ResponseType = ResponseType.PLAIN
+):
+    requested = None
+    if fields is not None:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in STOCK_METAINFO_SOURCES]
+        if unknown or not requested:
+            raise bad_request(f"unknown metainfo fields {unknown}")
 
-    df_yahoo = await yahoo.get_partial_metainfo_yahoo(ticker)
-    df_finviz = await finviz.get_partial_metainfo_finviz(ticker)
-    earnings_date = await yahoo.get_earnings_date(ticker)
-    earnings_date = pd.DataFrame(
-        [earnings_date], index=["Earnings Date"], columns=["Value"]
-    )
-    df = pd.concat([df_yahoo, df_finviz, earnings_date])
+    df = await metainfo.get_metainfo(ticker, requested)
+    converted_keys = convert_keys(df.index.tolist())
 
     if type is ResponseType.MODEL:
-        rename_dict = {
-            original: converted
-            for original, converted in zip(df.index, convert_keys(df.index.tolist()))
-        }
-        df.rename(index=rename_dict, inplace=True)
-        df_dict = df.to_dict()["Value"]
-        if df_dict["index_participation"] is not None:
+        df_dict = dict(zip(converted_keys, df["Value"]))
+        if df_dict.get("index_participation") is not None:
             df_dict["index_participation"] = df_dict["index_participation"].split(",")
         try:
+            if requested is not None:
+                return PartialStockMetaInfo(**df_dict)
             return StockMetaInfo(**df_dict)
         except ValidationError as e:
             raise internal_error(e)
@@ -217,14 +354,52 @@ async def get_metainfo(ticker: str, type: ResponseType = ResponseType.PLAIN):
     )
 
 
-@router.get("/news/{ticker}", response_model=list[NewsRecord] | str)
-async def get_news(ticker: str, type: ResponseType = ResponseType.PLAIN):
+async def _get_stored_news(
+    tickers: list[str],
+    since: str | None,
+    cursor: str | None,
+    limit: int,
+    type: ResponseType,
+    response: Response,
+    filename: str,
+):
+    """
+    Serves a page of news for tickers from the news store.
+    """
+
     try:
-        df = await finviz.get_news(ticker)
-    except ElementNotFoundError as e:
-        return [] if type is ResponseType.MODEL else PlainTextResponse()
+        since_date = datetime.fromisoformat(since) if since is not None else None
+    except ValueError as e:
+        raise bad_request(f"wrong date format {e}")
+    if since_date is not None and since_date.tzinfo is not None:
+        # stored news dates are naive exchange local
+        since_date = since_date.astimezone(market_calendar.EXCHANGE_TZ).replace(
+            tzinfo=None
+        )
+
+    # refresh stale tickers the poller does not keep fresh, scrapes are bounded
+    # by NEWS_REFRESH_CONCURRENCY and stored news are served if finviz fails
+    polled_tickers = set(settings.NEWS_POLL_TICKERS)
+    await asyncio.gather(
+        *[
+            tasks.refresh_news(ticker)
+            for ticker in tickers
+            if ticker not in polled_tickers
+        ],
+        return_exceptions=True,
+    )
+
+    store = tasks.get_news_store()
+    try:
+        df, next_cursor = await asyncio.to_thread(
+            store.query, tickers, since=since_date, cursor=cursor, limit=limit
+        )
+    except InvalidCursorError as e:
+        raise bad_request(str(e))
 
     if type is ResponseType.MODEL:
+        if next_cursor is not None:
+            response.headers["X-Next-Cursor"] = next_cursor
         rename_dict = {
             "Date": "date",
             "Title": "title",
@@ -238,6 +413,78 @@ async def get_news(ticker: str, type: ResponseType = ResponseType.PLAIN):
         except ValidationError:
             return []
 
-    return forge_csv_response(
-        df, is_file=type is ResponseType.CSV, filename=f"{ticker}_news"
+    csv_response = forge_csv_response(
+        df, is_file=type is ResponseType.CSV, filename=filename
     )
+    if next_cursor is not None:
+        csv_response.headers["X-Next-Cursor"] = next_cursor
+    return csv_response
+
+
+@router.get("/news/{ticker}", response_model=list[NewsRecord] | str)
+async def get_news(
+    ticker: str,
+    response: Response,
+    since: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(settings.NEWS_PAGE_SIZE, gt=0, le=settings.NEWS_MAX_PAGE_SIZE),
+    type: ResponseType = ResponseType.PLAIN,
+):
+    return await _get_stored_news(
+        [ticker.upper()],
+        since,
+        cursor,
+        limit,
+        type,
+        response,
+        filename=f"{ticker}_news",
+    )
+
+
+@router.get("/news", response_model=list[NewsRecord] | str)
+async def get_merged_news(
+    tickers: str,
+    response: Response,
+    since: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(settings.NEWS_PAGE_SIZE, gt=0, le=settings.NEWS_MAX_PAGE_SIZE),
+    type: ResponseType = ResponseType.PLAIN,
+):
+    ticker_list = [t.strip().upper() for t in tickers.split(",") if t.strip()]
+    if len(ticker_list) == 0:
+        raise bad_request("no tickers given")
+
+    return await _get_stored_news(
+        ticker_list,
+        since,
+        cursor,
+        limit,
+        type,
+        response,
+        filename="news",
+    )
+
+
+@router.post("/jobs", response_model=ExportJobStatus)
+async def submit_export_job(job_request: ExportJobRequest, request: Request):
+    # the whole universe is charged up front, units then run as batch work
+    try:
+        admission_controller.charge(
+            client_id(request.scope), export_job_cost(job_request)
+        )
+    except QuotaExceededError as e:
+        raise too_many_requests(str(e), e.retry_after)
+    return await tasks.get_export_manager().submit(job_request)
+
+
+@router.get("/jobs/{job_id}", response_model=ExportJobStatus)
+async def get_export_job(job_id: str):
+    job_status = await tasks.get_export_manager().status(job_id)
+    if job_status is None:
+        raise not_found(f"export job {job_id}")
+    return job_status
+
+
+@router.get("/admission/metrics", response_model=AdmissionMetrics)
+async def get_admission_metrics():
+    return admission_controller.metrics()
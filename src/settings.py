@@ -0,0 +1,90 @@
+"""
+Deployment settings read from environment variables.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.10.3
+"""
+
+import os
+
+
+def _get_list(name: str) -> list[str]:
+    """
+    Reads comma separated list from environment variable.
+    """
+
+    value = os.environ.get(name, "")
+    return [item.strip().upper() for item in value.split(",") if item.strip()]
+
+
+def _get_bool(name: str, default: bool) -> bool:
+    """
+    Reads boolean flag from environment variable.
+    """
+
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# modules imported in background once worker is serving, empty to import on demand
+WARMUP_MODULES = (
+    ["pandas", "aiohttp", "bs4", "lxml", "yfinance"]
+    if _get_bool("WARMUP_IMPORTS", True)
+    else []
+)
+
+# upstream http
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "100"))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "30"))
+
+# yahoo backend, "yfinance" runs yfinance in threads, "native" uses aiohttp
+YAHOO_BACKEND = os.environ.get("YAHOO_BACKEND", "yfinance")
+YAHOO_BASE_URL = os.environ.get("YAHOO_BASE_URL", "https://query2.finance.yahoo.com")
+YAHOO_COOKIE_URL = os.environ.get("YAHOO_COOKIE_URL", "https://fc.yahoo.com")
+
+# admission control, quota costs are in units of a light request
+ADMISSION_CONCURRENCY = int(os.environ.get("ADMISSION_CONCURRENCY", "32"))
+ADMISSION_QUOTA_RATE = float(os.environ.get("ADMISSION_QUOTA_RATE", "5"))
+ADMISSION_QUOTA_BURST = float(os.environ.get("ADMISSION_QUOTA_BURST", "200"))
+ADMISSION_IDLE_TTL = float(os.environ.get("ADMISSION_IDLE_TTL", "600"))
+# X-API-Key values accounted per key, requests with other keys count as their ip
+ADMISSION_API_KEYS = frozenset(
+    key.strip()
+    for key in os.environ.get("ADMISSION_API_KEYS", "").split(",")
+    if key.strip()
+)
+
+# history cache
+HISTORY_CACHE_MAX_BYTES = int(os.environ.get("HISTORY_CACHE_MAX_BYTES", 256 * 2**20))
+INTRADAY_CACHE_TTL = float(os.environ.get("INTRADAY_CACHE_TTL", "60"))
+
+# finviz html parsing, "process" or "thread" pool
+PARSER_POOL = os.environ.get("PARSER_POOL", "process")
+PARSER_WORKERS = int(os.environ.get("PARSER_WORKERS", "2"))
+
+# analytics
+ANALYTICS_MAX_TICKERS = int(os.environ.get("ANALYTICS_MAX_TICKERS", "500"))
+ANALYTICS_CONCURRENCY = int(os.environ.get("ANALYTICS_CONCURRENCY", "16"))
+ANALYTICS_MAX_WINDOW = int(os.environ.get("ANALYTICS_MAX_WINDOW", "2520"))
+
+# intraday archive, bars of collected tickers are kept beyond yahoo retention
+INTRADAY_ARCHIVE_PATH = os.environ.get("INTRADAY_ARCHIVE_PATH", "intraday")
+INTRADAY_TICKERS = _get_list("INTRADAY_TICKERS")
+INTRADAY_MAX_RANGE_DAYS = int(os.environ.get("INTRADAY_MAX_RANGE_DAYS", "366"))
+INTRADAY_COLLECT_INTERVAL = float(os.environ.get("INTRADAY_COLLECT_INTERVAL", "900"))
+
+# bulk export jobs
+EXPORT_PATH = os.environ.get("EXPORT_PATH", "exports")
+EXPORT_CONCURRENCY = int(os.environ.get("EXPORT_CONCURRENCY", "8"))
+
+# news store
+NEWS_DB_PATH = os.environ.get("NEWS_DB_PATH", "news.db")
+NEWS_POLL_TICKERS = _get_list("NEWS_POLL_TICKERS")
+NEWS_POLL_INTERVAL = float(os.environ.get("NEWS_POLL_INTERVAL", "300"))
+NEWS_REFRESH_INTERVAL = float(os.environ.get("NEWS_REFRESH_INTERVAL", "60"))
+NEWS_REFRESH_CONCURRENCY = int(os.environ.get("NEWS_REFRESH_CONCURRENCY", "8"))
+NEWS_PAGE_SIZE = int(os.environ.get("NEWS_PAGE_SIZE", "100"))
+NEWS_MAX_PAGE_SIZE = int(os.environ.get("NEWS_MAX_PAGE_SIZE", "1000"))
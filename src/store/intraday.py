@@ -0,0 +1,215 @@
+"""
+Append-only archive of finished 1-minute bars, partitioned by ticker and day.
+
+Every partition directory holds one raw binary file per column, bars are only
+ever appended and files are read back memory-mapped.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.1
+"""
+
+from __future__ import annotations
+
+import fcntl
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+
+import market_calendar
+from utils import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+BAR_SECONDS = 60
+
+# column name in archive -> (DataFrame column, dtype)
+COLUMNS = {
+    "timestamp": (None, "<i8"),  # epoch nanoseconds of bar start
+    "open": ("Open", "<f4"),
+    "high": ("High", "<f4"),
+    "low": ("Low", "<f4"),
+    "close": ("Close", "<f4"),
+    "volume": ("Volume", "<i8"),
+}
+
+AGGREGATIONS = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+
+def aggregate_bars(df: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """
+    Aggregates 1-minute bars into bars of minutes, aligned to session open.
+
+    Args:
+        df (pd.DataFrame): 1-minute bars with exchange local DatetimeIndex
+        minutes (int): minutes per aggregated bar
+
+    Returns:
+        pd.DataFrame: OHLCV bars labelled by their start
+    """
+
+    open_offset = market_calendar.SESSION_OPEN.hour * 60 + (
+        market_calendar.SESSION_OPEN.minute
+    )
+    resampled = df[list(AGGREGATIONS)].resample(
+        f"{minutes}min",
+        origin="start_day",
+        offset=f"{open_offset % minutes}min",
+        label="left",
+        closed="left",
+    )
+    return resampled.agg(AGGREGATIONS).dropna(subset=["Open"])
+
+
+class IntradayArchive:
+    """
+    1-minute bar archive under root/TICKER/YYYY-MM-DD/column.bin.
+
+    Appends hold an exclusive lock per partition, so the collectors of all
+    workers can share one archive. Every method is blocking.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _partition(self, ticker: str, day: date) -> Path:
+        return self.root / ticker.upper() / day.isoformat()
+
+    @contextmanager
+    def _locked(self, partition: Path):
+        partition.mkdir(parents=True, exist_ok=True)
+        with open(partition / ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def _length(partition: Path) -> int:
+        """
+        Gets number of complete rows, a crash mid-append leaves columns uneven.
+        """
+
+        lengths = []
+        for column, (_name, dtype) in COLUMNS.items():
+            path = partition / f"{column}.bin"
+            size = path.stat().st_size if path.exists() else 0
+            lengths.append(size // np.dtype(dtype).itemsize)
+        return min(lengths)
+
+    def _read_partition(self, partition: Path) -> dict[str, np.ndarray]:
+        length = self._length(partition) if partition.exists() else 0
+        if length == 0:
+            return {
+                column: np.empty(0, dtype) for column, (_, dtype) in COLUMNS.items()
+            }
+
+        return {
+            column: np.memmap(
+                partition / f"{column}.bin", dtype=dtype, mode="r", shape=(length,)
+            )
+            for column, (_name, dtype) in COLUMNS.items()
+        }
+
+    def claim_collection(self, ticker: str, max_age: float) -> bool:
+        """
+        Marks ticker as collected unless a collector did within max_age.
+
+        Args:
+            ticker (str): stock ticker symbol
+            max_age (float): seconds a previous collection stays fresh
+
+        Returns:
+            bool: whether the caller should collect ticker
+        """
+
+        ticker_dir = self.root / ticker.upper()
+        marker = ticker_dir / ".collected_at"
+        with self._locked(ticker_dir):
+            if marker.exists():
+                collected_at = float(marker.read_text() or 0)
+                if time.time() - collected_at < max_age:
+                    return False
+            marker.write_text(str(time.time()))
+            return True
+
+    def append(self, ticker: str, df: pd.DataFrame) -> int:
+        """
+        Appends finished bars newer than the archived ones.
+
+        Args:
+            ticker (str): stock ticker symbol
+            df (pd.DataFrame): 1-minute bars of yahoo.get_history
+
+        Returns:
+            int: number of appended bars
+        """
+
+        index = pd.DatetimeIndex(df.index).tz_convert(market_calendar.EXCHANGE_TZ)
+        now = pd.Timestamp.now(tz=market_calendar.EXCHANGE_TZ)
+        finished = index + pd.Timedelta(seconds=BAR_SECONDS) <= now
+        df = df[finished]
+        index = index[finished]
+
+        appended = 0
+        for day, positions in pd.Series(range(len(df))).groupby(index.date):
+            partition = self._partition(ticker, day)
+            rows = df.iloc[positions.to_numpy()]
+            timestamps = index[positions.to_numpy()].asi8
+
+            with self._locked(partition):
+                length = self._length(partition)
+                last = (
+                    self._read_partition(partition)["timestamp"][-1]
+                    if length
+                    else np.iinfo(np.int64).min
+                )
+                new = timestamps > last
+                if not new.any():
+                    continue
+
+                for column, (name, dtype) in COLUMNS.items():
+                    values = timestamps if name is None else rows[name].to_numpy()
+                    with open(
+                        partition / f"{column}.bin", "r+b" if length else "wb"
+                    ) as f:
+                        f.truncate(length * np.dtype(dtype).itemsize)
+                        f.seek(0, os.SEEK_END)
+                        f.write(
+                            np.ascontiguousarray(values[new], dtype=dtype).tobytes()
+                        )
+                appended += int(new.sum())
+
+        return appended
+
+    def read(self, ticker: str, start: date, end: date) -> pd.DataFrame:
+        """
+        Reads archived 1-minute bars of days from start to end inclusive.
+
+        Returns:
+            pd.DataFrame: OHLCV bars with exchange local DatetimeIndex
+        """
+
+        days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        partitions = [
+            self._read_partition(self._partition(ticker, day)) for day in days
+        ]
+        columns = {
+            column: np.concatenate([partition[column] for partition in partitions])
+            for column in COLUMNS
+        }
+
+        index = pd.DatetimeIndex(
+            columns.pop("timestamp").view("M8[ns]"), name="Date"
+        ).tz_localize("UTC")
+        return pd.DataFrame(
+            {COLUMNS[column][0]: values for column, values in columns.items()},
+            index=index.tz_convert(market_calendar.EXCHANGE_TZ),
+        )
@@ -0,0 +1,205 @@
+"""
+Persistent news store backed by sqlite, deduplicated by news link.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.1.2
+"""
+
+from __future__ import annotations
+
+import base64
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+
+from utils import lazy_import
+
+pd = lazy_import("pandas")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    link TEXT NOT NULL,
+    date TEXT NOT NULL,
+    title TEXT NOT NULL,
+    publisher TEXT NOT NULL,
+    thumb_img_src TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS news_link ON news (link);
+CREATE INDEX IF NOT EXISTS news_date ON news (date DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS news_tickers (
+    ticker TEXT NOT NULL,
+    news_id INTEGER NOT NULL REFERENCES news (id),
+    PRIMARY KEY (ticker, news_id)
+);
+
+CREATE TABLE IF NOT EXISTS news_polls (
+    ticker TEXT PRIMARY KEY,
+    polled_at REAL NOT NULL
+);
+"""
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class InvalidCursorError(Exception):
+    pass
+
+
+def encode_cursor(date: str, news_id: int) -> str:
+    """
+    Encodes position of the last returned news as opaque cursor.
+    """
+
+    return base64.urlsafe_b64encode(f"{date}|{news_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    """
+    Decodes cursor produced by encode_cursor into (date, id).
+
+    Raises:
+        InvalidCursorError if cursor is malformed.
+    """
+
+    try:
+        date, news_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        datetime.strptime(date, DATE_FORMAT)
+        return date, int(news_id)
+    except ValueError as e:
+        raise InvalidCursorError(f"invalid cursor {cursor}") from e
+
+
+class NewsStore:
+    """
+    News index shared by all workers through a sqlite file.
+
+    Every method is blocking, wrap calls inside asyncio.to_thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def known_links(self, ticker: str, limit: int = 200) -> set[str]:
+        """
+        Gets links of the newest stored news for ticker, a finviz page only
+        lists the latest 100 news so older links never match.
+        """
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT n.link FROM news n "
+                "JOIN news_tickers t ON t.news_id = n.id WHERE t.ticker = ? "
+                "ORDER BY n.date DESC, n.id DESC LIMIT ?",
+                (ticker, limit),
+            )
+            return {link for (link,) in rows}
+
+    def last_polled(self, ticker: str) -> float | None:
+        """
+        Gets unix time of the last successful poll of ticker.
+        """
+
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT polled_at FROM news_polls WHERE ticker = ?", (ticker,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def add(self, ticker: str, df: pd.DataFrame) -> int:
+        """
+        Adds unseen news for ticker, already stored links are skipped.
+
+        Args:
+            ticker (str): stock ticker symbol
+            df (pd.DataFrame): news in the format of finviz.get_news
+
+        Returns:
+            int: number of newly stored news
+        """
+
+        added = 0
+        with closing(self._connect()) as conn, conn:
+            columns = ["Link", "Date", "Title", "Publisher", "Thumb Img Src"]
+            for link, date, title, publisher, thumb_img_src in df[columns].itertuples(
+                index=False, name=None
+            ):
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO news "
+                    "(link, date, title, publisher, thumb_img_src) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (link, date.strftime(DATE_FORMAT), title, publisher, thumb_img_src),
+                )
+                added += cursor.rowcount
+                conn.execute(
+                    "INSERT OR IGNORE INTO news_tickers (ticker, news_id) "
+                    "SELECT ?, id FROM news WHERE link = ?",
+                    (ticker, link),
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO news_polls (ticker, polled_at) VALUES (?, ?)",
+                (ticker, time.time()),
+            )
+
+        return added
+
+    def query(
+        self,
+        tickers: list[str],
+        since: datetime | None = None,
+        cursor: str | None = None,
+        limit: int = 100,
+    ) -> tuple[pd.DataFrame, str | None]:
+        """
+        Gets news for tickers from newest to oldest, one page at a time.
+
+        Args:
+            tickers (list[str]): stock ticker symbols to merge
+            since (datetime | None): only news published after this datetime
+            cursor (str | None): cursor returned with the previous page
+            limit (int): maximum number of news in the page
+
+        Returns:
+            tuple[pd.DataFrame, str | None]: news page and cursor of the next page
+        """
+
+        conditions = [f"t.ticker IN ({','.join('?' * len(tickers))})"]
+        params: list = list(tickers)
+        if since is not None:
+            conditions.append("n.date > ?")
+            params.append(since.strftime(DATE_FORMAT))
+        if cursor is not None:
+            date, news_id = decode_cursor(cursor)
+            conditions.append("(n.date < ? OR (n.date = ? AND n.id < ?))")
+            params.extend([date, date, news_id])
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT n.id, n.date, n.title, n.link, n.publisher, "
+                "n.thumb_img_src FROM news n "
+                "JOIN news_tickers t ON t.news_id = n.id "
+                f"WHERE {' AND '.join(conditions)} "
+                "ORDER BY n.date DESC, n.id DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+
+        df = pd.DataFrame(
+            [row[1:] for row in rows],
+            columns=["Date", "Title", "Link", "Publisher", "Thumb Img Src"],
+        )
+        df["Date"] = pd.to_datetime(df["Date"], format=DATE_FORMAT)
+        return df, next_cursor
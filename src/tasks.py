@@ -0,0 +1,131 @@
+"""
+Background tasks and shared stores of the server.
+
+Author: tigerding
+Email: zhiyuanding01@gmail.com
+Version: 0.3.2
+"""
+
+import asyncio
+import time
+from functools import cache
+
+import settings
+from jobs import ExportJobManager
+from models.history import Period
+from robot import finviz, yahoo
+from store.intraday import IntradayArchive
+from store.news import NewsStore
+
+
+@cache
+def get_news_store() -> NewsStore:
+    """
+    Gets news store of this worker, opened on first use.
+    """
+
+    return NewsStore(settings.NEWS_DB_PATH)
+
+
+@cache
+def get_news_refresh_semaphore() -> asyncio.Semaphore:
+    """
+    Gets semaphore bounding concurrent finviz news scrapes of this worker.
+    """
+
+    return asyncio.Semaphore(settings.NEWS_REFRESH_CONCURRENCY)
+
+
+@cache
+def get_export_manager() -> ExportJobManager:
+    """
+    Gets export job manager of this worker.
+    """
+
+    return ExportJobManager(settings.EXPORT_PATH, settings.EXPORT_CONCURRENCY)
+
+
+@cache
+def get_intraday_archive() -> IntradayArchive:
+    """
+    Gets intraday archive of this worker.
+    """
+
+    return IntradayArchive(settings.INTRADAY_ARCHIVE_PATH)
+
+
+async def collect_intraday(tickers: list[str], interval: float):
+    """
+    Appends finished 1-minute bars of tickers into the intraday archive,
+    runs until cancelled.
+
+    Args:
+        tickers (list[str]): stock ticker symbols
+        interval (float): seconds between collections
+    """
+
+    archive = get_intraday_archive()
+
+    async def collect(ticker: str):
+        # every worker runs a collector, skip tickers another one just collected
+        if not await asyncio.to_thread(
+            archive.claim_collection, ticker, max_age=interval / 2
+        ):
+            return
+        # 5 days of 1m bars catch up on any downtime within yahoo retention
+        df = await yahoo.get_history(ticker, interval="1m", period=Period.WEEK)
+        await asyncio.to_thread(archive.append, ticker, df)
+
+    while True:
+        await asyncio.gather(
+            *[collect(ticker) for ticker in tickers],
+            return_exceptions=True,  # a failing ticker must not stop collecting
+        )
+        await asyncio.sleep(interval)
+
+
+async def refresh_news(
+    ticker: str, max_age: float = settings.NEWS_REFRESH_INTERVAL
+) -> int:
+    """
+    Adds unseen finviz news for ticker into the news store.
+
+    Args:
+        ticker (str): stock ticker symbol
+        max_age (float): seconds since the last poll before finviz is scraped again
+
+    Returns:
+        int: number of newly stored news
+
+    Raises:
+        Exceptions if scraping finviz fails.
+    """
+
+    store = get_news_store()
+    async with get_news_refresh_semaphore():
+        # checked after waiting, another request may have refreshed meanwhile
+        last_polled = await asyncio.to_thread(store.last_polled, ticker)
+        if last_polled is not None and time.time() - last_polled < max_age:
+            return 0
+
+        known_links = await asyncio.to_thread(store.known_links, ticker)
+        df = await finviz.get_news(ticker, known_links=known_links)
+        return await asyncio.to_thread(store.add, ticker, df)
+
+
+async def poll_news(tickers: list[str], interval: float):
+    """
+    Keeps news store up to date for tickers, runs until cancelled.
+
+    Args:
+        tickers (list[str]): stock ticker symbols
+        interval (float): seconds between polls
+    """
+
+    while True:
+        # other workers share the store, skip tickers they just polled
+        await asyncio.gather(
+            *[refresh_news(ticker, max_age=interval / 2) for ticker in tickers],
+            return_exceptions=True,  # a failing ticker must not stop polling
+        )
+        await asyncio.sleep(interval)
@@ -3,16 +3,49 @@ Utilities file.
 
 Author: tigerding
 Email: zhiyuanding01@gmail.com
-Version: 0.1.2
+Version: 0.4.0
 """
 
-import pandas as pd
+from __future__ import annotations
+
+import importlib
+import math
 from io import StringIO
+from types import ModuleType
 from fastapi import status, HTTPException
 from fastapi.responses import PlainTextResponse
 from urllib.parse import urlparse
 
 
+class LazyModule(ModuleType):
+    """
+    Module proxy that imports the real module on first attribute access.
+
+    Keeps heavy dependencies out of worker startup, the import itself is
+    guarded by the import system locks so first access is thread safe.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._module: ModuleType | None = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Gets lazily imported module, the module is loaded when first used.
+    """
+
+    return LazyModule(name)
+
+
+pd = lazy_import("pandas")
+
+
 def forge_csv_response(
     df: pd.DataFrame, is_file: bool, filename: str
 ) -> PlainTextResponse:
@@ -65,6 +98,18 @@ def bad_request(msg: str) -> HTTPException:
     return HTTPException(status.HTTP_400_BAD_REQUEST, f"Bad request: {msg}")
 
 
+def not_found(msg: str) -> HTTPException:
+    return HTTPException(status.HTTP_404_NOT_FOUND, f"Not found: {msg}")
+
+
+def too_many_requests(msg: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status.HTTP_429_TOO_MANY_REQUESTS,
+        f"Too many requests: {msg}",
+        headers={"Retry-After": str(math.ceil(retry_after))},
+    )
+
+
 def get_url_origin(url: str) -> str:
     parsed_url = urlparse(url)
     return f"{parsed_url.scheme}://{parsed_url.netloc}"
@@ -0,0 +1,17 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+@pytest.fixture
+def load_fixture():
+    def load(name: str):
+        return json.loads((FIXTURES / name).read_text())
+
+    return load
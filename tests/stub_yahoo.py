@@ -0,0 +1,112 @@
+"""
+Local stub of the yahoo endpoints serving recorded responses, shared by the
+tests and bench/yahoo_backends.py.
+"""
+
+import asyncio
+import threading
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any
+
+from aiohttp import web
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "yahoo"
+
+
+@asynccontextmanager
+async def serve_stub_yahoo(
+    latency: float = 0,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    Serves yahoo on a free local port, quote summary needs the latest crumb.
+
+    Args:
+        latency (float): seconds every response is delayed, like a remote server
+
+    Yields:
+        tuple[str, dict[str, Any]]: base url and mutable server state
+    """
+
+    fixtures = {path.name: path.read_bytes() for path in FIXTURES.glob("*.json")}
+    state = {
+        "crumb": "crumb-1",
+        "crumbs_issued": 0,
+        "crumb_status": 200,
+        "chart_params": [],
+    }
+
+    def json_response(name: str, status: int = 200) -> web.Response:
+        return web.Response(
+            body=fixtures[name], status=status, content_type="application/json"
+        )
+
+    @web.middleware
+    async def delay(request, handler):
+        if latency:
+            await asyncio.sleep(latency)
+        return await handler(request)
+
+    async def cookie(_request):
+        return web.Response(status=404)
+
+    async def crumb(_request):
+        if state["crumb_status"] != 200:
+            return web.Response(status=state["crumb_status"], text="Too Many Requests")
+        await asyncio.sleep(0.01)  # lets concurrent callers pile up
+        state["crumbs_issued"] += 1
+        state["crumb"] = f"crumb-{state['crumbs_issued']}"
+        return web.Response(text=state["crumb"])
+
+    async def chart(request):
+        state["chart_params"].append(dict(request.query))
+        return json_response(f"chart_aapl_{request.query.get('interval', '1d')}.json")
+
+    async def quote_summary(request):
+        if request.query.get("crumb") != state["crumb"]:
+            return json_response("quote_summary_unauthorized.json", status=401)
+        return json_response("quote_summary_aapl.json")
+
+    app = web.Application(middlewares=[delay])
+    app.router.add_get("/cookie", cookie)
+    app.router.add_get("/v1/test/getcrumb", crumb)
+    app.router.add_get("/v8/finance/chart/{ticker}", chart)
+    app.router.add_get("/v10/finance/quoteSummary/{ticker}", quote_summary)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    try:
+        yield f"http://127.0.0.1:{runner.addresses[0][1]}", state
+    finally:
+        await runner.cleanup()
+
+
+@contextmanager
+def stub_server_thread(latency: float = 0) -> Iterator[str]:
+    """
+    Runs the stub server on its own loop thread, off the caller's event loop.
+    """
+
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    stop = asyncio.Event()
+    base_urls = []
+
+    async def serve():
+        async with serve_stub_yahoo(latency=latency) as (base_url, _state):
+            base_urls.append(base_url)
+            started.set()
+            await stop.wait()
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(serve(),))
+    thread.start()
+    started.wait()
+    try:
+        yield base_urls[0]
+    finally:
+        loop.call_soon_threadsafe(stop.set)
+        thread.join()
+        loop.close()
@@ -0,0 +1,59 @@
+"""
+Tests of admission costs and quotas.
+"""
+
+from fastapi.testclient import TestClient
+from starlette.datastructures import QueryParams
+
+import settings
+import tasks
+from admission import admission_controller, export_job_cost, request_cost
+from app import app
+from models.jobs import ExportJobRequest, ExportJobState, ExportJobStatus
+
+
+def test_metainfo_fields_cost_per_source():
+    # all fields of one source, then fields of all three sources
+    assert request_cost("metainfo", QueryParams("fields=market_cap,ebitda")) == 1
+    assert (
+        request_cost(
+            "metainfo",
+            QueryParams("fields=market_cap,earnings_date,index_participation"),
+        )
+        == 3
+    )
+    assert request_cost("metainfo", QueryParams("fields=unknown")) == 1
+    assert request_cost("metainfo", QueryParams("")) == 3
+
+
+def test_export_job_up_to_burst_is_accepted(monkeypatch):
+    submitted = []
+
+    class ExportManager:
+        async def submit(self, job_request: ExportJobRequest) -> ExportJobStatus:
+            submitted.append(job_request)
+            return ExportJobStatus(
+                id=str(len(submitted)),
+                state=ExportJobState.RUNNING,
+                total=len(job_request.tickers),
+                completed=0,
+                failed={},
+                path="",
+            )
+
+    monkeypatch.setattr(tasks, "get_export_manager", ExportManager)
+    monkeypatch.setattr(admission_controller, "_buckets", {})
+
+    # 20 tickers of max history cost the full default burst of 200
+    job = {"tickers": [f"T{i}" for i in range(20)], "datasets": ["history"]}
+    assert export_job_cost(ExportJobRequest(**job)) == settings.ADMISSION_QUOTA_BURST
+
+    client = TestClient(app)
+    response = client.post("/jobs", json=job)
+    assert response.status_code == 200
+    assert len(submitted) == 1
+
+    response = client.post("/jobs", json=job)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert len(submitted) == 1
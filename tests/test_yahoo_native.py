@@ -0,0 +1,162 @@
+"""
+Tests of the native yahoo backend against recorded yahoo responses, served
+by a local stub server for the http paths.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import settings
+from robot import session, yahoo_native
+from stub_yahoo import serve_stub_yahoo
+
+
+def test_parse_chart_daily_is_adjusted(load_fixture):
+    chart = load_fixture("yahoo/chart_aapl_1d.json")
+    df = yahoo_native.parse_chart(chart, "1d")
+
+    # the all null bar is dropped, daily bars are at exchange midnight
+    assert list(df.index.strftime("%Y-%m-%d")) == [
+        "2024-03-04",
+        "2024-03-05",
+        "2024-03-06",
+        "2024-03-08",
+    ]
+    assert str(df.index.tz) == "America/New_York"
+    assert (df.index.hour == 0).all()
+    assert df.index.name == "Date"
+
+    quote = chart["chart"]["result"][0]["indicators"]["quote"][0]
+    adjclose = chart["chart"]["result"][0]["indicators"]["adjclose"][0]["adjclose"]
+    ratio = adjclose[0] / quote["close"][0]
+    assert df["Close"].iloc[0] == pytest.approx(adjclose[0])
+    assert df["Open"].iloc[0] == pytest.approx(quote["open"][0] * ratio)
+    assert df["High"].iloc[0] == pytest.approx(quote["high"][0] * ratio)
+    assert df["Low"].iloc[0] == pytest.approx(quote["low"][0] * ratio)
+    assert df["Volume"].iloc[0] == quote["volume"][0]
+
+    assert list(df["Dividends"]) == [0, 0, 0.24, 0]
+    assert (df["Stock Splits"] == 0).all()
+
+
+def test_parse_chart_intraday_dedupes_running_bar(load_fixture):
+    df = yahoo_native.parse_chart(load_fixture("yahoo/chart_aapl_1m.json"), "1m")
+
+    assert list(df.index.strftime("%H:%M")) == ["09:30", "09:31", "09:33"]
+    assert df.index.name == "Datetime"
+    # no adjclose for intraday bars, the later running bar wins
+    assert df["Close"].iloc[-1] == pytest.approx(169.4499969482422)
+    assert df["Volume"].iloc[-1] == 288012
+
+
+def test_parse_chart_error(load_fixture):
+    with pytest.raises(yahoo_native.YahooError, match="No data found"):
+        yahoo_native.parse_chart(load_fixture("yahoo/chart_not_found.json"), "1d")
+
+
+def test_flatten_quote_summary(load_fixture):
+    info = yahoo_native._flatten_quote_summary(
+        load_fixture("yahoo/quote_summary_aapl.json")
+    )
+
+    assert info["regularMarketPrice"] == 170.73
+    assert info["marketCap"] == 2636218138624
+    assert info["sector"] == "Technology"
+    assert info["fullTimeEmployees"] == 161000
+    assert info["beta"] == 1.29
+    assert info["currency"] == "USD"
+    assert info["fiftyTwoWeekHigh"] is None
+
+
+@asynccontextmanager
+async def stub_yahoo(monkeypatch):
+    """
+    Points the native backend at a stub yahoo server.
+    """
+
+    async with serve_stub_yahoo() as (base_url, state):
+        monkeypatch.setattr(
+            yahoo_native, "CHART_URL", f"{base_url}/v8/finance/chart/{{ticker}}"
+        )
+        monkeypatch.setattr(
+            yahoo_native,
+            "QUOTE_SUMMARY_URL",
+            f"{base_url}/v10/finance/quoteSummary/{{ticker}}",
+        )
+        monkeypatch.setattr(yahoo_native, "CRUMB_URL", f"{base_url}/v1/test/getcrumb")
+        monkeypatch.setattr(settings, "YAHOO_COOKIE_URL", f"{base_url}/cookie")
+        monkeypatch.setattr(yahoo_native, "_crumb", None)
+        try:
+            yield state
+        finally:
+            await session.close_session()
+
+
+def test_get_history_localizes_naive_dates(monkeypatch):
+    async def run():
+        async with stub_yahoo(monkeypatch) as state:
+            df = await yahoo_native.get_history(
+                "AAPL", start=datetime(2024, 3, 4), end=datetime(2024, 3, 9)
+            )
+            return df, state["chart_params"][0]
+
+    df, params = asyncio.run(run())
+
+    assert len(df) == 4
+    # midnight new york, not midnight of the server timezone
+    assert params["period1"] == str(
+        int(pd.Timestamp("2024-03-04", tz="America/New_York").timestamp())
+    )
+    assert params["period2"] == str(
+        int(pd.Timestamp("2024-03-09", tz="America/New_York").timestamp())
+    )
+
+
+def test_get_info_refreshes_expired_crumb(monkeypatch):
+    async def run():
+        async with stub_yahoo(monkeypatch) as state:
+            first = await yahoo_native.get_info("AAPL")
+            # the server rotates the crumb, the cached one is now rejected
+            state["crumb"] = "rotated"
+            second = await yahoo_native.get_info("AAPL")
+            return first, second, state["crumbs_issued"]
+
+    first, second, crumbs_issued = asyncio.run(run())
+
+    assert first == second
+    assert np.isclose(first["trailingPE"], 26.55)
+    assert crumbs_issued == 2
+
+
+def test_get_info_fetches_crumb_once_for_concurrent_calls(monkeypatch):
+    async def run():
+        async with stub_yahoo(monkeypatch) as state:
+            await asyncio.gather(*[yahoo_native.get_info("AAPL") for _ in range(10)])
+            cold_start = state["crumbs_issued"]
+            state["crumb"] = "rotated"
+            await asyncio.gather(*[yahoo_native.get_info("AAPL") for _ in range(10)])
+            return cold_start, state["crumbs_issued"]
+
+    cold_start, after_rotation = asyncio.run(run())
+
+    assert cold_start == 1
+    assert after_rotation == 2
+
+
+def test_get_info_does_not_cache_error_crumb(monkeypatch):
+    async def run():
+        async with stub_yahoo(monkeypatch) as state:
+            state["crumb_status"] = 429
+            with pytest.raises(yahoo_native.YahooError, match="429"):
+                await yahoo_native.get_info("AAPL")
+            assert yahoo_native._crumb is None
+
+            state["crumb_status"] = 200
+            return await yahoo_native.get_info("AAPL")
+
+    assert asyncio.run(run())["sector"] == "Technology"